@@ -112,6 +112,18 @@ else:
         }
     }
 
+# ========================
+# Caché
+# ========================
+# Compartido entre workers de gunicorn en producción (p. ej. Redis o memcached);
+# en desarrollo basta el caché en memoria del proceso.
+CACHES = {
+    'default': {
+        'BACKEND':  config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 # ========================
 # Archivos estáticos y media
 # ========================
@@ -122,6 +134,16 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Entrega de archivos protegidos (ver main/file_delivery.py):
+# - 'main.file_delivery.StreamingDelivery' (por defecto): Django envía el archivo.
+# - 'main.file_delivery.XAccelRedirectDelivery': nginx lo envía desde una location internal.
+# - 'main.file_delivery.XSendfileDelivery': Apache/lighttpd lo envía con X-Sendfile.
+FILE_DELIVERY_BACKEND = config('FILE_DELIVERY_BACKEND', default='main.file_delivery.StreamingDelivery')
+FILE_DELIVERY_ACCEL_PREFIX = config('FILE_DELIVERY_ACCEL_PREFIX', default='/protected-media/')
+
+# Caché en disco de los PDF generados (fuera de MEDIA_ROOT: no se sirve públicamente)
+REPORT_PDF_CACHE_DIR = config('REPORT_PDF_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'report_pdf'))
+
 # ========================
 # Correo
 # ========================
@@ -1,30 +1,39 @@
+import time
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import timedelta
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.contrib.auth.models import Group
-from docs.models import FileVencible
+from major_equipment.utils.expirations import (
+    BUCKET_EXPIRED, BUCKET_UPCOMING, get_user_documents, get_visible_entity_ids,
+    index_documents_by_entity, scan_expiring_documents,
+)
 
 class Command(BaseCommand):
     help = 'Envía un correo diario a cada usuario del grupo "notificar_vencimiento" con los documentos por vencer o vencidos.'
 
-    def handle(self, *args, **options):
-        today = timezone.localdate()
-        notice_days = [30, 20] + list(range(14, -1, -1))
-
-        # Buscar documentos próximos a vencer
-        upcoming_files = FileVencible.objects.filter(
-            expiration_date__in=[today + timedelta(days=days) for days in notice_days]
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Arma los correos sin enviarlos (backend en memoria) y muestra el resumen.',
+        )
+        parser.add_argument(
+            '--output-dir',
+            help='Escribe los correos como archivos en este directorio en vez de enviarlos.',
         )
-        # Buscar documentos vencidos
-        expired_files = FileVencible.objects.filter(expiration_date__lt=today)
 
-        # Si no hay ningún documento, no hace nada
-        if not upcoming_files.exists() and not expired_files.exists():
-            self.stdout.write(self.style.WARNING("No hay documentos por vencer ni vencidos. No se enviarán correos."))
-            return
+    def get_connection(self, options):
+        """Conexión de correo: SMTP (settings), en memoria (--dry-run) o a archivos (--output-dir)."""
+        if options['output_dir']:
+            return get_connection('django.core.mail.backends.filebased.EmailBackend', file_path=options['output_dir'])
+        if options['dry_run']:
+            return get_connection('django.core.mail.backends.locmem.EmailBackend')
+        return get_connection()
+
+    def build_message(self, documents) -> str:
+        """Arma el cuerpo del correo con los documentos indicados (ya filtrados para el usuario)."""
+        upcoming_files = [document for document in documents if document["bucket"] == BUCKET_UPCOMING]
+        expired_files = [document for document in documents if document["bucket"] == BUCKET_EXPIRED]
 
-        # Construir el mensaje de correo
         message_lines = []
 
         message_lines.append("Estimado(a):")
@@ -35,18 +44,18 @@ class Command(BaseCommand):
         )
         message_lines.append("")
 
-        if upcoming_files.exists():
+        if upcoming_files:
             message_lines.append("Documentos próximos a vencer:")
             message_lines.append("")
             for file in upcoming_files:
-                message_lines.append(f"- {file.short_name} (vence el {file.expiration_date.strftime('%d de %B de %Y')})")
+                message_lines.append(f"- {self.describe(file)} (vence el {file['expiration_date'].strftime('%d de %B de %Y')})")
             message_lines.append("")
 
-        if expired_files.exists():
+        if expired_files:
             message_lines.append("Documentos ya vencidos:")
             message_lines.append("")
             for file in expired_files:
-                message_lines.append(f"- {file.short_name} (venció el {file.expiration_date.strftime('%d de %B de %Y')})")
+                message_lines.append(f"- {self.describe(file)} (venció el {file['expiration_date'].strftime('%d de %B de %Y')})")
             message_lines.append("")
 
         message_lines.append("Le recomendamos revisar y gestionar esta situación a la brevedad para asegurar el cumplimiento de los requisitos correspondientes.")
@@ -57,10 +66,29 @@ class Command(BaseCommand):
         message_lines.append("Atentamente,")
         message_lines.append("Equipo de Informática")
 
+        return "\n".join(message_lines)
+
+    def describe(self, document) -> str:
+        """Nombre del documento seguido de las unidades a las que pertenece."""
+        if not document["units"]:
+            return document["short_name"]
+        units = ", ".join(f"unidad {unit_number} ({label})" for label, unit_number in document["units"])
+        return f"{document['short_name']} – {units}"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        today = timezone.localdate()
 
+        # Documentos vencidos o por vencer, con sus unidades y entidades (una consulta)
+        documents = scan_expiring_documents(today)
 
+        # Si no hay ningún documento, no hace nada
+        if not documents:
+            self.stdout.write(self.style.WARNING("No hay documentos por vencer ni vencidos. No se enviarán correos."))
+            return
+
+        by_entity = index_documents_by_entity(documents)
         subject = "Notificación de documentos por vencer o vencidos"
-        message = "\n".join(message_lines)
 
         # Buscar usuarios del grupo
         try:
@@ -69,16 +97,49 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('El grupo "notificar_vencimiento" no existe.'))
             return
 
-        # Enviar correo a cada usuario del grupo
+        # Armar un correo por usuario del grupo, solo con los documentos de las entidades que ve.
+        # Los usuarios con el mismo alcance comparten el cuerpo del mensaje.
+        email_messages = []
+        messages_by_scope = {}
         for user in group.user_set.all():
-            if user.email:
-                send_mail(
-                    subject,
-                    message,
-                    None,  # Usa DEFAULT_FROM_EMAIL de settings.py
-                    [user.email],
-                )
-                self.stdout.write(self.style.SUCCESS(f"Correo enviado a {user.email}."))
-            else:
+            if not user.email:
                 self.stdout.write(self.style.WARNING(f"El usuario {user.username} no tiene email registrado."))
+                continue
+
+            entity_ids = get_visible_entity_ids(user)
+            scope = None if entity_ids is None else frozenset(entity_ids)
+            if scope not in messages_by_scope:
+                user_documents = get_user_documents(documents, by_entity, scope)
+                messages_by_scope[scope] = self.build_message(user_documents) if user_documents else None
+            message = messages_by_scope[scope]
+
+            if message is None:
+                self.stdout.write(f"El usuario {user.username} no tiene documentos por vencer en sus entidades.")
+                continue
+            email_messages.append(EmailMessage(
+                subject,
+                message,
+                None,  # Usa DEFAULT_FROM_EMAIL de settings.py
+                [user.email],
+            ))
+        built = time.perf_counter()
 
+        if not email_messages:
+            self.stdout.write(self.style.WARNING("Ningún usuario del grupo tiene correos que recibir."))
+            return
+
+        # Enviar todos los correos por una sola conexión (una sesión SMTP/TLS)
+        connection = self.get_connection(options)
+        sent = connection.send_messages(email_messages) or 0
+        finished = time.perf_counter()
+
+        action = "enviado" if not (options['dry_run'] or options['output_dir']) else "preparado"
+        for email in email_messages[:sent]:
+            self.stdout.write(self.style.SUCCESS(f"Correo {action} a {email.to[0]}."))
+        if sent < len(email_messages):
+            self.stdout.write(self.style.ERROR(f"No se enviaron {len(email_messages) - sent} correos."))
+
+        self.stdout.write(
+            f"{sent} correos en {finished - started:.2f} s "
+            f"(consultas y armado {built - started:.2f} s, envío {finished - built:.2f} s)."
+        )
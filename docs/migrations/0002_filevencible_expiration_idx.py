@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 18:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='filevencible',
+            index=models.Index(fields=['expiration_date'], name='filevencible_expiration_idx'),
+        ),
+    ]
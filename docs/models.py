@@ -42,6 +42,10 @@ class FileVencible(File):
     class Meta:
         verbose_name = "Archivo con vencimiento"
         verbose_name_plural = "Archivos con vencimiento"
+        indexes = [
+            # Documentos por rango de vencimiento (avisos y panel de vencimientos)
+            models.Index(fields=["expiration_date"], name="filevencible_expiration_idx"),
+        ]
     
     @property
     def is_expired(self):
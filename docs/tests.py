@@ -1,3 +1,100 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission, User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from docs.models import FileVencible
+from firebrigade.models import Entity, EntityType, Membership, Position
+from major_equipment.models import Unit
+from major_equipment.utils.expirations import BUCKET_EXPIRED, BUCKET_UPCOMING, scan_expiring_documents
+
+
+class NotifyExpirationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        first = Entity.objects.create(name="Primera", type=EntityType.COMPANY)
+        second = Entity.objects.create(name="Segunda", type=EntityType.COMPANY)
+
+        cls.soap = FileVencible.objects.create(file="documentos/a.pdf", short_name="SOAP A", expiration_date=cls.today + timedelta(days=5))
+        cls.permit = FileVencible.objects.create(file="documentos/b.pdf", short_name="Permiso B", expiration_date=cls.today - timedelta(days=1))
+        cls.loose = FileVencible.objects.create(file="documentos/c.pdf", short_name="Suelto", expiration_date=cls.today + timedelta(days=30))
+        FileVencible.objects.create(file="documentos/d.pdf", short_name="Vigente", expiration_date=cls.today + timedelta(days=6 * 30))
+        Unit.objects.create(unit_number="1", description="Unidad 1", plate_number="AB0001", entity=first, soap=cls.soap)
+        Unit.objects.create(unit_number="2", description="Unidad 2", plate_number="AB0002", entity=second, vehicle_permit=cls.permit)
+
+        group = Group.objects.create(name="notificar_vencimiento")
+        admin = User.objects.create_superuser("admin", email="admin@example.com")
+        captain = User.objects.create_user("capitan", email="capitan@example.com")
+        position = Position.objects.create(name="Capitán")
+        position.permissions.add(Permission.objects.get(codename="view_company_majorequipment"))
+        Membership.objects.create(user=captain, entity=first, position=position)
+        outsider = User.objects.create_user("externo", email="externo@example.com")
+        group.user_set.add(admin, captain, outsider, User.objects.create_user("sin_email"))
+
+    def call(self, *args):
+        out = StringIO()
+        call_command("notify_expirations", *args, stdout=out)
+        return out.getvalue()
+
+    def outbox(self):
+        return {message.to[0]: message.body for message in mail.outbox}
+
+    def test_scan_classifies_and_resolves_owners(self):
+        with CaptureQueriesContext(connection) as ctx:
+            documents = scan_expiring_documents(self.today)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        by_name = {document["short_name"]: document for document in documents}
+        self.assertEqual(set(by_name), {"SOAP A", "Permiso B", "Suelto"})
+        self.assertEqual(by_name["Permiso B"]["bucket"], BUCKET_EXPIRED)
+        self.assertEqual(by_name["SOAP A"]["bucket"], BUCKET_UPCOMING)
+        self.assertEqual(by_name["SOAP A"]["units"], [("SOAP", "1")])
+        self.assertEqual(by_name["Suelto"]["entity_ids"], set())
+
+    def test_digests_are_scoped_to_visible_entities(self):
+        self.call()
+        outbox = self.outbox()
+        self.assertEqual(set(outbox), {"admin@example.com", "capitan@example.com"})
+        for name in ("SOAP A", "Permiso B", "Suelto"):
+            self.assertIn(name, outbox["admin@example.com"])
+        self.assertIn("SOAP A – unidad 1 (SOAP)", outbox["capitan@example.com"])
+        self.assertNotIn("Permiso B", outbox["capitan@example.com"])
+        self.assertNotIn("Suelto", outbox["capitan@example.com"])
+
+    def test_sends_all_messages_over_one_connection(self):
+        with mock.patch.object(EmailBackend, "send_messages", autospec=True, side_effect=EmailBackend.send_messages) as send:
+            output = self.call()
+        self.assertEqual(send.call_count, 1)
+        self.assertIn("sin_email no tiene email", output)
+        self.assertIn("externo no tiene documentos", output)
+        self.assertIn("2 correos en", output)
+
+    def test_dry_run_uses_memory_backend(self):
+        with self.settings(EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend"):
+            output = self.call("--dry-run")
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("Correo preparado a admin@example.com", output)
+
+    def test_output_dir_writes_files(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.call("--output-dir", output_dir)
+            self.assertTrue(os.listdir(output_dir))
+        self.assertEqual(len(mail.outbox), 0)
 
-# Create your tests here.
+    def test_no_documents(self):
+        FileVencible.objects.filter(expiration_date__lte=self.today + timedelta(days=30)).update(
+            expiration_date=self.today + timedelta(days=100)
+        )
+        output = self.call()
+        self.assertIn("No hay documentos", output)
+        self.assertEqual(len(mail.outbox), 0)
@@ -1,27 +1,35 @@
 from django.contrib.auth.backends import ModelBackend
+from firebrigade.scope import get_scope_version
+
+# Cachés de permisos que ModelBackend guarda sobre la instancia del usuario.
+MODEL_BACKEND_CACHE_ATTRS = ("_perm_cache", "_user_perm_cache", "_group_perm_cache")
+
+# Atributo del usuario con la versión de permisos con la que se llenaron esas cachés.
+PERM_CACHE_VERSION_ATTR = "_firebrigade_perm_version"
+
 
 class RolePermissionBackend(ModelBackend):
     """
-    Agrega permisos heredados desde el cargo (Position) del usuario,
-    además de conservar los permisos propios del usuario.
+    Conserva los permisos propios del usuario y de sus grupos.
+
+    Los permisos de los cargos (Position) no se otorgan de forma global mediante
+    has_perm: se aplican por entidad a través de firebrigade.scope
+    (get_user_entity_ids_with_permission).
     """
 
     def get_user_permissions(self, user_obj, obj=None):
-        # Mantener comportamiento estándar (permisos asignados directamente al usuario)
-        perms = set(super().get_user_permissions(user_obj, obj))
-
-        # Cortocircuitos seguros
-        if not getattr(user_obj, "is_authenticated", False) or not getattr(user_obj, "is_active", False):
-            return perms
-
-        # Tomar permisos desde Position si existe membership y position
-        membership = getattr(user_obj, "membership", None)
-        position = getattr(membership, "position", None)
-        if not position:
-            return perms
+        # Comportamiento estándar (permisos asignados directamente al usuario).
+        # La búsqueda anterior de un accesor 'membership' nunca encontraba cargo
+        # (Membership.user es ForeignKey), por lo que no se agregan permisos por cargo.
+        return super().get_user_permissions(user_obj, obj)
 
-        # Evita N+1 y construye "app_label.codename"
-        qs = position.permissions.select_related("content_type") \
-                                 .values_list("content_type__app_label", "codename")
-        perms |= {f"{app}.{code}" for app, code in qs}
-        return perms
+    def get_all_permissions(self, user_obj, obj=None):
+        # ModelBackend guarda sus cachés en el usuario sin invalidarlas nunca;
+        # si las señales invalidaron los permisos, se descartan antes de recalcular.
+        version = get_scope_version()
+        if getattr(user_obj, PERM_CACHE_VERSION_ATTR, version) != version:
+            for attr in MODEL_BACKEND_CACHE_ATTRS:
+                if hasattr(user_obj, attr):
+                    delattr(user_obj, attr)
+        setattr(user_obj, PERM_CACHE_VERSION_ATTR, version)
+        return super().get_all_permissions(user_obj, obj)
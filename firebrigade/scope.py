@@ -0,0 +1,137 @@
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from firebrigade.models import Membership
+
+# Versión local (del proceso) de los permisos por cargo. Las señales de firebrigade
+# la incrementan cuando cambian membresías, permisos de cargos o del usuario,
+# con lo que toda instantánea calculada antes en este proceso queda obsoleta.
+_scope_version = 0
+
+# Atributo del usuario donde se guarda la instantánea durante la petición.
+SCOPE_CACHE_ATTR = "_firebrigade_scope"
+
+# Claves en el caché compartido (framework de caché de Django) entre procesos.
+SHARED_VERSION_KEY = "firebrigade:scope:version"
+SHARED_SCOPE_KEY = "firebrigade:scope:user:{user_id}"
+SHARED_SCOPE_TIMEOUT = 60 * 60  # 1 hora
+
+
+class UserScope:
+    """
+    Instantánea de los permisos que un usuario obtiene a través de sus cargos,
+    por entidad.
+
+    Atributos:
+        version (int): Versión local del proceso con la que se resolvió.
+        entities (dict[str, frozenset[int]]): Por codename, ids de las entidades
+            en las que el usuario tiene ese permiso por algún cargo.
+    """
+
+    def __init__(self, version: int, entities=None):
+        self.version = version
+        self.entities = entities or {}
+
+    def entity_ids(self, codename: str) -> frozenset:
+        """Ids de las entidades en las que el usuario tiene el permiso indicado."""
+        return self.entities.get(codename, frozenset())
+
+
+def get_scope_version() -> int:
+    return _scope_version
+
+
+def get_shared_version() -> int:
+    """
+    Retorna la versión compartida entre procesos. Si no existe en el caché (primer uso
+    o desalojo), se inicializa con un valor basado en la hora para no reutilizar
+    versiones antiguas.
+    """
+    version = cache.get(SHARED_VERSION_KEY)
+    if version is None:
+        cache.add(SHARED_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(SHARED_VERSION_KEY)
+    return version
+
+
+def bump_shared_version() -> None:
+    """Incrementa la versión compartida, invalidando las entradas de todos los procesos."""
+    try:
+        cache.incr(SHARED_VERSION_KEY)
+    except ValueError:
+        cache.add(SHARED_VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_user_scopes() -> None:
+    """
+    Marca como obsoletas todas las instantáneas de permisos calculadas, tanto en este
+    proceso como en el caché compartido.
+
+    La versión compartida se incrementa de inmediato y nuevamente al confirmar la
+    transacción, para descartar lo que otros procesos hayan calculado con datos
+    aún no confirmados.
+    """
+    global _scope_version
+    _scope_version += 1
+    bump_shared_version()
+    transaction.on_commit(bump_shared_version)
+
+
+def build_user_scope(user: User, version: int) -> UserScope:
+    """
+    Calcula la instantánea de permisos por cargo del usuario con una sola consulta
+    sobre sus membresías.
+    """
+    rows = (
+        Membership.objects
+        .filter(user=user, position__permissions__isnull=False)
+        .values_list("entity_id", "position__permissions__codename")
+    )
+
+    entities = {}
+    for entity_id, codename in rows:
+        entities.setdefault(codename, set()).add(entity_id)
+
+    return UserScope(
+        version,
+        entities={codename: frozenset(ids) for codename, ids in entities.items()},
+    )
+
+
+def load_user_scope(user: User) -> UserScope:
+    """
+    Obtiene la instantánea del usuario desde el caché compartido si su versión
+    coincide con la vigente; en otro caso la calcula y la guarda en el caché.
+    """
+    local_version = get_scope_version()
+    shared_version = get_shared_version()
+    key = SHARED_SCOPE_KEY.format(user_id=user.pk)
+
+    entry = cache.get(key)
+    if entry is not None and entry["version"] == shared_version:
+        return UserScope(local_version, entities=entry["entities"])
+
+    scope = build_user_scope(user, local_version)
+    cache.set(
+        key,
+        {"version": shared_version, "entities": scope.entities},
+        SHARED_SCOPE_TIMEOUT,
+    )
+    return scope
+
+
+def get_user_scope(user: User) -> UserScope:
+    """
+    Retorna la instantánea de permisos del usuario, resolviéndola una sola vez
+    por petición (se guarda sobre la instancia del usuario).
+    Se vuelve a resolver si las señales invalidaron los permisos desde entonces.
+    """
+    if not getattr(user, "is_authenticated", False) or not getattr(user, "is_active", False):
+        return UserScope(get_scope_version())
+
+    scope = getattr(user, SCOPE_CACHE_ATTR, None)
+    if scope is None or scope.version != get_scope_version():
+        scope = load_user_scope(user)
+        setattr(user, SCOPE_CACHE_ATTR, scope)
+    return scope
@@ -1,8 +1,10 @@
-from django.db.models.signals import pre_save, post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils.timezone import now
+from django.contrib.auth.models import User, Group
 import os
-from .models import Membership, MembershipHistory, Entity
+from .models import Membership, MembershipHistory, Entity, Position
+from .scope import invalidate_user_scopes
 from config.utils.files import delete_file
 
 @receiver(pre_save, sender=Membership)
@@ -68,4 +70,20 @@ def delete_old_logo_on_entity_update(sender, instance, **kwargs):
         return
 
     if old_instance.logo and old_instance.logo != instance.logo:
-        delete_file(old_instance.logo.path)
\ No newline at end of file
+        delete_file(old_instance.logo.path)
+
+# Cuando cambian cargos, membresías o permisos, las instantáneas de permisos quedan obsoletas
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+@receiver(post_delete, sender=Position)
+def invalidate_scopes_on_membership_change(sender, **kwargs):
+    invalidate_user_scopes()
+
+
+@receiver(m2m_changed, sender=Position.permissions.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_scopes_on_permissions_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_user_scopes()
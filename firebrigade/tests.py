@@ -1,3 +1,79 @@
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from firebrigade.models import Entity, EntityType, Membership, Position
+from firebrigade.scope import get_user_scope
+from firebrigade.utils import get_entities_for_user, get_user_entities_with_permission
+
+
+class UserScopeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.second = Entity.objects.create(name="Segunda Compañía", type=EntityType.COMPANY)
+        cls.view_own_entity = Permission.objects.get(codename="view_own_entity")
+        cls.position = Position.objects.create(name="Capitán")
+        cls.position.permissions.add(cls.view_own_entity)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("bombero", password="x")
+        Membership.objects.create(user=self.user, entity=self.first, position=self.position)
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def test_role_permissions_apply_per_entity_not_globally(self):
+        self.assertFalse(self.user.has_perm("firebrigade.view_own_entity"))
+        self.assertFalse(self.user.has_perm("firebrigade.view_entity"))
+        self.assertEqual(list(get_user_entities_with_permission(self.user, "view_own_entity")), [self.first])
+
+    def test_scope_is_computed_once_per_request(self):
+        self.user.has_perm("firebrigade.view_own_entity")
+        get_user_entities_with_permission(self.user, "view_own_entity").exists()
+        with self.assertNumQueries(0):
+            self.user.has_perm("firebrigade.view_own_entity")
+            self.user.has_perm("firebrigade.view_entity")
+            get_user_entities_with_permission(self.user, "view_own_entity")
+        self.assertEqual(list(get_entities_for_user(self.user)), [self.first])
+
+    def test_membership_change_invalidates_scope(self):
+        self.assertEqual(list(get_entities_for_user(self.user)), [self.first])
+
+        Membership.objects.create(user=self.user, entity=self.second, position=self.position)
+
+        self.assertEqual(
+            set(get_entities_for_user(self.user)), {self.first, self.second}
+        )
+
+    def test_position_permissions_change_invalidates_scope(self):
+        self.assertTrue(get_entities_for_user(self.user).exists())
+
+        self.position.permissions.remove(self.view_own_entity)
+
+        self.assertFalse(get_user_entities_with_permission(self.user, "view_own_entity").exists())
+        self.assertFalse(get_entities_for_user(self.user).exists())
+
+    def test_user_permissions_change_invalidates_scope(self):
+        self.assertFalse(self.user.has_perm("firebrigade.view_entity"))
+
+        self.user.user_permissions.add(Permission.objects.get(codename="view_entity"))
+
+        self.assertTrue(self.user.has_perm("firebrigade.view_entity"))
+
+    def test_scope_is_shared_between_requests(self):
+        get_user_scope(self.user)
+
+        # Nueva instancia del usuario, como en otra petición u otro proceso.
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            scope = get_user_scope(user)
+        self.assertEqual(scope.entity_ids("view_own_entity"), {self.first.pk})
+
+    def test_shared_scope_is_invalidated_by_signals(self):
+        get_entities_for_user(self.user)
+
+        Membership.objects.create(user=self.user, entity=self.second, position=self.position)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(set(get_entities_for_user(user)), {self.first, self.second})
@@ -1,6 +1,7 @@
 from firebrigade.models import Membership, Entity, Position
 from django.contrib.auth.models import User
 from django.db.models.query import QuerySet
+from firebrigade.scope import get_user_scope
 
 def get_entities_for_user(user: User) -> QuerySet:
     """
@@ -14,9 +15,9 @@ def get_entities_for_user(user: User) -> QuerySet:
         return entities
 
     # Entidades en las que el usuario tiene el permiso por algún cargo
-    own_entities = get_user_entities_with_permission(user, 'view_own_entity')
-    if own_entities.exists():
-        return own_entities
+    own_entity_ids = get_user_entity_ids_with_permission(user, 'view_own_entity')
+    if own_entity_ids:
+        return entities.filter(pk__in=own_entity_ids)
 
     return Entity.objects.none()
 
@@ -38,11 +39,15 @@ def get_user_positions(user: User) -> QuerySet:
     """
     return Position.objects.filter(membership__user=user).distinct()
 
+def get_user_entity_ids_with_permission(user: User, codename: str) -> frozenset:
+    """
+    Devuelve los ids de las entidades en las que el usuario tiene, a través de algún cargo,
+    el permiso indicado. Se resuelve desde la instantánea de permisos de la petición.
+    """
+    return get_user_scope(user).entity_ids(codename)
+
 def get_user_entities_with_permission(user: User, codename: str) -> QuerySet:
     """
     Devuelve las entidades en las que el usuario tiene, a través de algún cargo, el permiso indicado.
     """
-    return Entity.objects.filter(
-        membership__user=user,
-        membership__position__permissions__codename=codename
-    ).distinct()
+    return Entity.objects.filter(pk__in=get_user_entity_ids_with_permission(user, codename))
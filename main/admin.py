@@ -1,3 +1,19 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import Job, JobStatus
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display    = ('task', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter     = ('status', 'task')
+    readonly_fields = ('locked_at', 'last_error', 'created_at', 'finished_at')
+    actions         = ('requeue',)
+
+    @admin.action(description="Volver a encolar los trabajos seleccionados")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=JobStatus.RUNNING).update(
+            status=JobStatus.PENDING, attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f"{updated} trabajos vueltos a la cola.")
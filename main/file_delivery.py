@@ -0,0 +1,248 @@
+"""
+Entrega de archivos protegidos.
+
+Las vistas validan permisos y delegan la transferencia de bytes al backend
+configurado en settings.FILE_DELIVERY_BACKEND:
+
+- StreamingDelivery (por defecto, desarrollo): Django lee y envía el archivo (FileResponse).
+- XAccelRedirectDelivery (nginx): responde solo cabeceras con X-Accel-Redirect hacia una
+  location `internal` que apunta a MEDIA_ROOT, p. ej.:
+
+      location /protected-media/ {
+          internal;
+          alias /ruta/a/media/;
+      }
+
+- XSendfileDelivery (Apache mod_xsendfile, lighttpd): responde con X-Sendfile y la ruta absoluta.
+
+Así los workers de gunicorn quedan libres mientras el proxy envía PDFs e imágenes.
+
+Además, serve_file calcula ETag y Last-Modified a partir del tamaño y la fecha de
+modificación del archivo y responde 304 si el navegador ya tiene la versión vigente.
+StreamingDelivery atiende peticiones Range (206); con los backends de proxy, los
+rangos los resuelve el servidor web.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from django.utils.module_loading import import_string
+
+# Configuración de logging
+import logging
+logger = logging.getLogger('myapp')
+
+# Rango de bytes simple: "bytes=inicio-fin", "bytes=inicio-" o "bytes=-sufijo".
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Tamaño de los bloques al enviar un rango.
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    (inicio, fin) inclusive del rango pedido, o None si no hay un rango simple que
+    atender (se envía el archivo completo). Lanza RangeNotSatisfiable si el rango
+    queda fuera del archivo.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def iter_file_range(handle, start, length):
+    """Lee `length` bytes desde `start` por bloques y cierra el archivo al terminar."""
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+class FileValidators:
+    """Tamaño, fecha de modificación y ETag de un archivo en su storage."""
+
+    def __init__(self, size, modified_time):
+        self.size = size
+        self.last_modified = int(modified_time.timestamp())
+        self.etag = quote_etag(f"{size:x}-{int(modified_time.timestamp() * 1_000_000):x}")
+
+    @classmethod
+    def for_file(cls, field_file):
+        """Validadores del archivo, o None si el storage no informa tamaño o fecha."""
+        try:
+            return cls(field_file.storage.size(field_file.name), field_file.storage.get_modified_time(field_file.name))
+        except (NotImplementedError, OSError, SuspiciousFileOperation):
+            return None
+
+    def matches_if_range(self, if_range):
+        """True si la cabecera If-Range coincide con la versión actual (ETag o fecha)."""
+        if not if_range:
+            return True
+        return if_range.strip() in (self.etag, http_date(self.last_modified))
+
+    def apply(self, response):
+        response["ETag"] = self.etag
+        response["Last-Modified"] = http_date(self.last_modified)
+        return response
+
+
+class StreamingDelivery:
+    """
+    Envía el archivo desde Django. Sirve con cualquier storage (también remotos) y
+    atiende rangos simples de bytes (206) cuando se conocen los validadores.
+    """
+
+    def open(self, field_file):
+        try:
+            return field_file.storage.open(field_file.name, "rb")
+        except (FileNotFoundError, SuspiciousFileOperation):
+            raise Http404("Archivo no encontrado.")
+        except OSError:
+            logger.exception("Error de E/S al abrir el archivo | name=%s", field_file.name)
+            raise Http404("Archivo no encontrado.")
+
+    def get_response(self, request, field_file, content_type, disposition, validators=None):
+        byte_range = None
+        if validators and validators.matches_if_range(request.headers.get("If-Range")):
+            try:
+                byte_range = parse_range_header(request.headers.get("Range"), validators.size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{validators.size}"
+                return response
+
+        handle = self.open(field_file)
+        if byte_range is None:
+            response = FileResponse(handle, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(handle, start, end - start + 1), status=206, content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{validators.size}"
+            response["Content-Length"] = str(end - start + 1)
+
+        if validators:
+            response["Accept-Ranges"] = "bytes"
+        response["Content-Disposition"] = disposition
+        return response
+
+
+class XAccelRedirectDelivery(StreamingDelivery):
+    """Delega el envío a nginx con X-Accel-Redirect (settings.FILE_DELIVERY_ACCEL_PREFIX + nombre)."""
+
+    header = "X-Accel-Redirect"
+
+    def get_header_value(self, field_file):
+        prefix = settings.FILE_DELIVERY_ACCEL_PREFIX.rstrip("/")
+        return f"{prefix}/{quote(field_file.name.replace(os.sep, '/'))}"
+
+    def get_response(self, request, field_file, content_type, disposition, validators=None):
+        try:
+            # Solo se delegan archivos del storage local; los remotos se envían desde Django
+            field_file.storage.path(field_file.name)
+        except NotImplementedError:
+            return super().get_response(request, field_file, content_type, disposition, validators)
+        except SuspiciousFileOperation:
+            raise Http404("Archivo no encontrado.")
+
+        if not field_file.storage.exists(field_file.name):
+            raise Http404("Archivo no encontrado.")
+
+        response = HttpResponse(content_type=content_type)
+        response[self.header] = self.get_header_value(field_file)
+        response["Content-Disposition"] = disposition
+        return response
+
+
+class XSendfileDelivery(XAccelRedirectDelivery):
+    """Delega el envío al servidor web con X-Sendfile (ruta absoluta del archivo)."""
+
+    header = "X-Sendfile"
+
+    def get_header_value(self, field_file):
+        return field_file.storage.path(field_file.name)
+
+
+class StoredFile:
+    """Archivo identificado por su nombre en un storage (interfaz mínima de FieldFile)."""
+
+    def __init__(self, name, storage=default_storage):
+        self.name = name
+        self.storage = storage
+
+
+def get_file_delivery():
+    """Instancia del backend configurado en settings.FILE_DELIVERY_BACKEND."""
+    return import_string(settings.FILE_DELIVERY_BACKEND)()
+
+
+def serve_file(request, field_file, *, content_type=None, as_attachment=False, filename=None, headers=None):
+    """
+    Respuesta que entrega `field_file` (un FieldFile, o StoredFile para rutas relativas
+    a MEDIA_ROOT) con el backend configurado. Los permisos deben validarse antes.
+
+    Si el navegador ya tiene la versión vigente (If-None-Match / If-Modified-Since),
+    responde 304 sin abrir el archivo. Lanza Http404 si el archivo no existe.
+    """
+    if not field_file or not field_file.name:
+        raise Http404("Archivo no encontrado.")
+
+    validators = FileValidators.for_file(field_file)
+    if validators:
+        response = get_conditional_response(
+            request, etag=validators.etag, last_modified=validators.last_modified,
+        )
+    else:
+        response = None
+
+    if response is None:
+        filename = filename or os.path.basename(field_file.name)
+        if content_type is None:
+            content_type, _ = mimetypes.guess_type(filename)
+
+        response = get_file_delivery().get_response(
+            request,
+            field_file,
+            content_type or "application/octet-stream",
+            content_disposition_header(as_attachment, filename),
+            validators,
+        )
+
+    if validators:
+        validators.apply(response)
+    # Archivos protegidos: solo el navegador los guarda, y revalida con ETag en cada uso
+    patch_cache_control(response, private=True, no_cache=True)
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
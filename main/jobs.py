@@ -0,0 +1,146 @@
+"""
+Cola de trabajos en segundo plano respaldada por la base de datos (sin broker).
+
+Las tareas se registran con @register_job("app.nombre") en el módulo jobs.py de
+cada app y se encolan con enqueue("app.nombre", **parámetros). El comando
+run_worker las toma con select_for_update(skip_locked=True) en PostgreSQL y
+las ejecuta en un pool de hilos, reintentando con espera exponencial.
+"""
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from main.models import Job, JobStatus
+
+# Configuración de logging
+import logging
+logger = logging.getLogger('myapp')
+
+# Tareas registradas: nombre -> función.
+JOB_REGISTRY = {}
+
+# Espera antes del reintento n: BASE · 2^(n-1), con tope.
+RETRY_BACKOFF_BASE = timedelta(seconds=30)
+RETRY_BACKOFF_MAX = timedelta(hours=1)
+
+# Un trabajo "en ejecución" más tiempo que esto se considera abandonado (worker caído).
+STALE_JOB_TIMEOUT = timedelta(minutes=30)
+# Cada cuánto revisa un worker en marcha si hay trabajos abandonados.
+STALE_JOB_CHECK_INTERVAL = timedelta(minutes=1)
+
+
+def register_job(name: str):
+    """Decorador que registra una función como tarea con el nombre indicado."""
+    def decorator(func):
+        JOB_REGISTRY[name] = func
+        return func
+    return decorator
+
+
+def load_jobs() -> None:
+    """Importa el módulo jobs.py de cada app instalada (registra sus tareas)."""
+    autodiscover_modules("jobs")
+
+
+def enqueue(task: str, *, run_at=None, max_attempts: int = 5, **payload) -> Job:
+    """
+    Encola una tarea con parámetros serializables en JSON. Si hay una transacción
+    en curso, el worker solo la verá una vez confirmada.
+    """
+    return Job.objects.create(
+        task=task,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_on_commit(task: str, **kwargs) -> None:
+    """Encola la tarea al confirmar la transacción actual (o de inmediato si no hay)."""
+    transaction.on_commit(lambda: enqueue(task, **kwargs))
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_BACKOFF_BASE * 2 ** (attempts - 1), RETRY_BACKOFF_MAX)
+
+
+def claim_job():
+    """
+    Toma el siguiente trabajo pendiente y lo marca en ejecución, o retorna None.
+
+    En PostgreSQL, select_for_update(skip_locked=True) hace que los workers
+    concurrentes se salten las filas ya tomadas; en SQLite (desarrollo) se omite,
+    y la actualización condicional del estado evita que dos hilos tomen el mismo.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = Job.objects.filter(status=JobStatus.PENDING, run_at__lte=now).order_by("run_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        job = pending.first()
+        if job is None:
+            return None
+
+        claimed = Job.objects.filter(pk=job.pk, status=JobStatus.PENDING).update(
+            status=JobStatus.RUNNING, locked_at=now, attempts=F("attempts") + 1,
+        )
+        if not claimed:
+            return None
+
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job: Job) -> bool:
+    """
+    Ejecuta un trabajo ya tomado. Si falla, lo reprograma con espera exponencial o
+    lo marca como fallido al agotar los intentos. Retorna True si terminó bien.
+    """
+    func = JOB_REGISTRY.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'La tarea "{job.task}" no está registrada.')
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()[-5000:]
+        if func is not None and job.attempts < job.max_attempts:
+            job.status = JobStatus.PENDING
+            job.run_at = timezone.now() + get_retry_delay(job.attempts)
+            logger.warning("Trabajo %s falló (intento %s/%s); se reintentará", job, job.attempts, job.max_attempts)
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Trabajo %s falló definitivamente:\n%s", job, job.last_error)
+        job.locked_at = None
+        job.save(update_fields=["status", "run_at", "locked_at", "last_error", "finished_at"])
+        return False
+
+    job.status = JobStatus.DONE
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "locked_at", "finished_at"])
+    return True
+
+
+def requeue_stale_jobs() -> int:
+    """Devuelve a pendientes los trabajos abandonados por un worker caído."""
+    return Job.objects.filter(
+        status=JobStatus.RUNNING, locked_at__lt=timezone.now() - STALE_JOB_TIMEOUT,
+    ).update(status=JobStatus.PENDING, locked_at=None)
+
+
+def run_pending_jobs(limit=None) -> int:
+    """Ejecuta trabajos pendientes en este hilo hasta vaciar la cola (o hasta `limit`)."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
@@ -0,0 +1,80 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Script que se ejecuta en un proceso nuevo, como un worker de gunicorn recién iniciado:
+# carga config.wsgi y el URLconf (que el worker importa en su primera petición).
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import config.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(m for m in HEAVY_MODULES if m in sys.modules),
+}))
+"""
+
+# Módulos que no deben cargarse al iniciar un worker (se importan bajo demanda).
+HEAVY_MODULES = ("weasyprint", "cairocffi", "fontTools", "pydyf")
+
+
+def measure_startup(python: str = sys.executable) -> dict:
+    """
+    Mide en un proceso nuevo el tiempo de importación de config.wsgi + URLconf,
+    el RSS máximo del proceso y qué módulos pesados quedaron cargados.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"))
+    script = STARTUP_SCRIPT.replace("HEAVY_MODULES", repr(HEAVY_MODULES))
+    result = subprocess.run(
+        [python, "-c", script],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise CommandError(f"No se pudo iniciar config.wsgi:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque de un worker: tiempo de importación y RSS de config.wsgi. '
+        'Falla si se superan los límites indicados o si se cargan módulos pesados (p. ej. WeasyPrint).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Cantidad de procesos a medir.')
+        parser.add_argument('--max-seconds', type=float, help='Límite para la mediana del tiempo de importación.')
+        parser.add_argument('--max-rss-mb', type=float, help='Límite para la mediana del RSS máximo.')
+
+    def handle(self, *args, **options):
+        runs = [measure_startup() for _ in range(max(options['runs'], 1))]
+
+        seconds = statistics.median(run['seconds'] for run in runs)
+        rss_mb = statistics.median(run['rss_mb'] for run in runs)
+        heavy_modules = sorted({module for run in runs for module in run['heavy_modules']})
+
+        self.stdout.write(f"Importación config.wsgi + URLconf: {seconds * 1000:.0f} ms (mediana de {len(runs)})")
+        self.stdout.write(f"RSS máximo: {rss_mb:.1f} MB")
+
+        errors = []
+        if heavy_modules:
+            errors.append(f"Módulos pesados cargados al iniciar: {', '.join(heavy_modules)}")
+        if options['max_seconds'] is not None and seconds > options['max_seconds']:
+            errors.append(f"Tiempo de importación sobre el límite ({options['max_seconds']} s)")
+        if options['max_rss_mb'] is not None and rss_mb > options['max_rss_mb']:
+            errors.append(f"RSS sobre el límite ({options['max_rss_mb']} MB)")
+
+        if errors:
+            raise CommandError("\n".join(errors))
+        self.stdout.write(self.style.SUCCESS("Arranque dentro de los límites."))
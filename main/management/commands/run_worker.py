@@ -0,0 +1,89 @@
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from main.jobs import JOB_REGISTRY, STALE_JOB_CHECK_INTERVAL, claim_job, load_jobs, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los trabajos en segundo plano encolados en la base de datos '
+        '(PDF, imágenes) con un pool de hilos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Cantidad de hilos de trabajo.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Segundos de espera con la cola vacía.')
+        parser.add_argument('--burst', action='store_true', help='Termina cuando no quedan trabajos pendientes.')
+
+    def handle(self, *args, **options):
+        load_jobs()
+        self.requeue_lock = threading.Lock()
+        self.next_requeue = 0.0
+        self.requeue_stale_jobs_if_due()
+
+        self.stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: self.stop.set())
+
+        concurrency = max(options['concurrency'], 1)
+        self.stdout.write(
+            f'Worker iniciado: {concurrency} hilos, {len(JOB_REGISTRY)} tareas registradas '
+            f'({", ".join(sorted(JOB_REGISTRY))}).'
+        )
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda _: self.work(options['poll_interval'], options['burst']), range(concurrency)
+            ))
+
+        ok = sum(done for done, _ in results)
+        failed = sum(errors for _, errors in results)
+        self.stdout.write(self.style.SUCCESS(f'{ok} trabajos terminados, {failed} con error.'))
+
+    def requeue_stale_jobs_if_due(self) -> None:
+        """
+        Devuelve a la cola los trabajos abandonados por un worker caído, al iniciar y
+        luego cada STALE_JOB_CHECK_INTERVAL (un solo hilo a la vez).
+        """
+        if time.monotonic() < self.next_requeue or not self.requeue_lock.acquire(blocking=False):
+            return
+        try:
+            self.next_requeue = time.monotonic() + STALE_JOB_CHECK_INTERVAL.total_seconds()
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'{requeued} trabajos abandonados vueltos a la cola.'))
+        finally:
+            self.requeue_lock.release()
+
+    def work(self, poll_interval: float, burst: bool) -> tuple:
+        """Bucle de un hilo: toma y ejecuta trabajos hasta que se pida detener."""
+        done = errors = 0
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    self.requeue_stale_jobs_if_due()
+                    job = claim_job()
+                except DatabaseError as e:
+                    # p. ej. "database is locked" en SQLite con varios hilos: se reintenta
+                    self.stderr.write(f'No se pudo tomar un trabajo: {e}')
+                    self.stop.wait(poll_interval)
+                    continue
+                if job is None:
+                    if burst:
+                        break
+                    self.stop.wait(poll_interval)
+                    continue
+                if run_job(job):
+                    done += 1
+                else:
+                    errors += 1
+        finally:
+            connection.close()
+        return done, errors
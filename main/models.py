@@ -1,3 +1,41 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class JobStatus(models.TextChoices):
+    """
+    ENUM de estados de un trabajo en segundo plano.
+    """
+    PENDING = 'pending', 'Pendiente'
+    RUNNING = 'running', 'En ejecución'
+    DONE = 'done', 'Terminado'
+    FAILED = 'failed', 'Fallido'
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano (PDF, imágenes) encolado con
+    main.jobs.enqueue y ejecutado por el comando run_worker.
+    """
+    task         = models.CharField(max_length=200, verbose_name="Tarea")
+    payload      = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    status       = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.PENDING, verbose_name="Estado")
+    attempts     = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Máximo de intentos")
+    run_at       = models.DateTimeField(default=timezone.now, verbose_name="Ejecutar desde")
+    locked_at    = models.DateTimeField(blank=True, null=True, verbose_name="Tomado por un worker")
+    last_error   = models.TextField(blank=True, verbose_name="Último error")
+    created_at   = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    finished_at  = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de término")
+
+    class Meta:
+        verbose_name        = "Trabajo en segundo plano"
+        verbose_name_plural = "Trabajos en segundo plano"
+        ordering            = ["-created_at"]
+        indexes = [
+            # Búsqueda del siguiente trabajo pendiente
+            models.Index(fields=["status", "run_at"], name="job_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
@@ -1,3 +1,235 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from docs.models import File
+from main import jobs
+from main.management.commands.benchmark_startup import measure_startup
+from main.management.commands.run_worker import Command as RunWorkerCommand
+from main.models import Job, JobStatus
+
+
+class WorkerStartupTests(TestCase):
+
+    def test_worker_startup_does_not_load_pdf_renderer(self):
+        startup = measure_startup()
+        self.assertEqual(startup["heavy_modules"], [])
+
+
+class FileDeliveryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("bombero", password="x")
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        os.makedirs(os.path.join(media_root.name, "documentos"))
+        self.pdf_path = os.path.join(media_root.name, "documentos", "acta 1.pdf")
+        with open(self.pdf_path, "wb") as pdf:
+            pdf.write(b"%PDF-1.7 contenido")
+
+        self.client.force_login(self.user)
+
+    def get_pdf(self, path="documentos/acta 1.pdf"):
+        return self.client.get(reverse("main:ver_pdf", args=[path]), secure=True)
+
+    def test_streaming_fallback_sends_bytes(self):
+        response = self.get_pdf()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.7 contenido")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["X-Frame-Options"], "ALLOWALL")
+
+    def test_conditional_get_returns_304(self):
+        first = self.get_pdf()
+
+        response = self.client.get(
+            reverse("main:ver_pdf", args=["documentos/acta 1.pdf"]),
+            HTTP_IF_NONE_MATCH=first["ETag"], secure=True,
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+        response = self.client.get(
+            reverse("main:ver_pdf", args=["documentos/acta 1.pdf"]),
+            HTTP_IF_MODIFIED_SINCE=first["Last-Modified"], secure=True,
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # Al cambiar el archivo cambia el ETag
+        with open(self.pdf_path, "ab") as pdf:
+            pdf.write(b" nuevo")
+        response = self.client.get(
+            reverse("main:ver_pdf", args=["documentos/acta 1.pdf"]),
+            HTTP_IF_NONE_MATCH=first["ETag"], secure=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def get_range(self, byte_range, **headers):
+        return self.client.get(
+            reverse("main:ver_pdf", args=["documentos/acta 1.pdf"]),
+            HTTP_RANGE=byte_range, secure=True, **headers,
+        )
+
+    def test_byte_ranges(self):
+        response = self.get_range("bytes=0-7")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.7")
+        self.assertEqual(response["Content-Range"], "bytes 0-7/18")
+        self.assertEqual(response["Content-Length"], "8")
+
+        response = self.get_range("bytes=-9")
+        self.assertEqual(b"".join(response.streaming_content), b"contenido")
+
+        response = self.get_range("bytes=9-")
+        self.assertEqual(b"".join(response.streaming_content), b"contenido")
+
+        response = self.get_range("bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */18")
+
+        # Varios rangos o If-Range desactualizado: archivo completo
+        self.assertEqual(self.get_range("bytes=0-1,4-5").status_code, 200)
+        self.assertEqual(self.get_range("bytes=0-7", HTTP_IF_RANGE='"otro"').status_code, 200)
+
+    @override_settings(FILE_DELIVERY_BACKEND="main.file_delivery.XAccelRedirectDelivery")
+    def test_x_accel_redirect_hands_off_to_proxy(self):
+        response = self.get_pdf()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/documentos/acta%201.pdf")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+    @override_settings(FILE_DELIVERY_BACKEND="main.file_delivery.XSendfileDelivery")
+    def test_x_sendfile_uses_absolute_path(self):
+        document = File.objects.create(file="documentos/acta 1.pdf", short_name="Acta")
+
+        response = self.client.get(reverse("docs:protected_file", args=[document.pk]), secure=True)
+
+        self.assertEqual(response["X-Sendfile"], self.pdf_path)
+        self.assertTrue(response["Content-Disposition"].startswith("attachment"))
+
+    @override_settings(FILE_DELIVERY_BACKEND="main.file_delivery.XAccelRedirectDelivery")
+    def test_missing_or_outside_media_root_is_404(self):
+        self.assertEqual(self.get_pdf("documentos/otro.pdf").status_code, 404)
+        self.assertEqual(self.get_pdf("../settings.py").status_code, 404)
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        registry = {
+            "tests.record": lambda **payload: self.calls.append(payload),
+            "tests.fail": mock.Mock(side_effect=RuntimeError("SMTP caído")),
+        }
+        patcher = mock.patch.dict(jobs.JOB_REGISTRY, registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue_and_run(self):
+        job = jobs.enqueue("tests.record", report_id=7)
+
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(self.calls, [{"report_id": 7}])
+        self.assertEqual((job.status, job.attempts), (JobStatus.DONE, 1))
+        self.assertIsNone(jobs.claim_job())
+
+    def test_claimed_job_is_not_claimed_again(self):
+        first = jobs.enqueue("tests.record")
+        second = jobs.enqueue("tests.record")
+
+        self.assertEqual(jobs.claim_job().pk, first.pk)
+        self.assertEqual(jobs.claim_job().pk, second.pk)
+        self.assertIsNone(jobs.claim_job())
+
+    def test_future_jobs_wait(self):
+        jobs.enqueue("tests.record", run_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(jobs.run_pending_jobs(), 0)
+
+    def test_retries_with_backoff_then_fails(self):
+        job = jobs.enqueue("tests.fail", max_attempts=2)
+
+        jobs.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.PENDING, 1))
+        self.assertIn("SMTP caído", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=25))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_fails_without_retry(self):
+        job = jobs.enqueue("tests.missing")
+        jobs.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue("tests.record")
+        Job.objects.filter(pk=job.pk).update(
+            status=JobStatus.RUNNING, locked_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        self.assertEqual(jobs.run_pending_jobs(), 1)
+
+
+class RunWorkerTests(TransactionTestCase):
+
+    def test_burst_worker_runs_all_jobs(self):
+        calls = []
+        with mock.patch.dict(jobs.JOB_REGISTRY, {"tests.record": lambda n: calls.append(n)}):
+            for n in range(10):
+                jobs.enqueue("tests.record", n=n)
+            # Un hilo: la base SQLite en memoria de las pruebas no admite escrituras concurrentes
+            call_command("run_worker", concurrency=1, burst=True, stdout=io.StringIO())
+
+        self.assertEqual(sorted(calls), list(range(10)))
+        self.assertEqual(Job.objects.filter(status=JobStatus.DONE).count(), 10)
+
+    def test_running_worker_requeues_stale_jobs_periodically(self):
+        command = RunWorkerCommand(stdout=io.StringIO())
+        command.requeue_lock = threading.Lock()
+        command.next_requeue = 0.0
+        job = jobs.enqueue("tests.record")
+
+        def abandon():
+            Job.objects.filter(pk=job.pk).update(
+                status=JobStatus.RUNNING, locked_at=timezone.now() - timedelta(hours=1),
+            )
+
+        abandon()
+        command.requeue_stale_jobs_if_due()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, JobStatus.PENDING)
+
+        # Dentro del intervalo no se vuelve a revisar
+        abandon()
+        command.requeue_stale_jobs_if_due()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, JobStatus.RUNNING)
+
+        command.next_requeue = 0.0
+        command.requeue_stale_jobs_if_due()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, JobStatus.PENDING)
@@ -1,8 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
-from django.http import FileResponse, Http404
-from django.conf import settings
-import os
+from main.file_delivery import StoredFile, serve_file
 
 def index(request):
     if request.user.is_authenticated:
@@ -41,10 +39,10 @@ def home(request):
     return render(request, 'main/home.html', data)
 
 def serve_pdf_file(request, path):
-    full_path = os.path.join(settings.MEDIA_ROOT, path)
-    if os.path.exists(full_path):
-        response = FileResponse(open(full_path, 'rb'), content_type='application/pdf')
-        response['X-Frame-Options'] = 'ALLOWALL'
-        return response
-    else:
-        raise Http404("Archivo no encontrado")
\ No newline at end of file
+    # La ruta es relativa a MEDIA_ROOT; el storage rechaza rutas fuera de ella (404)
+    return serve_file(
+        request,
+        StoredFile(path),
+        content_type='application/pdf',
+        headers={'X-Frame-Options': 'ALLOWALL'},
+    )
\ No newline at end of file
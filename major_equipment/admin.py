@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 from .models import *
+from .utils.alert_rules import evaluate_entries_alerts
 
 admin.site.register(Unit)
 admin.site.register(UnitImage)
@@ -9,6 +11,21 @@ admin.site.register(Quotation)
 admin.site.register(MeetingWorkshop)
 
 
+@admin.register(FuelAnomaly)
+class FuelAnomalyAdmin(admin.ModelAdmin):
+    list_display  = ('fuel_log', 'kind', 'detail', 'created_at')
+    list_filter   = ('kind',)
+    list_select_related = ('fuel_log__station',)
+
+admin.site.register(FuelAnomalyRun)
+
+
+@admin.register(FuelMonthlySummary)
+class FuelMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display  = ('unit', 'year', 'month', 'loads', 'quantity', 'cost', 'distance')
+    list_filter   = ('year',)
+
+
 # ── Inlines para ReportTemplateItem ────────────────────────────────────────
 
 class ReportItemOptionInline(admin.TabularInline):
@@ -62,8 +79,24 @@ class ReportTemplateItemAdmin(admin.ModelAdmin):
 
 # ── Inline para Entradas de Reporte ───────────────────────────────────────
 
+class ReportEntryFormSet(BaseInlineFormSet):
+    """
+    Evalúa las alertas de todas las entradas del reporte en una sola pasada en memoria
+    y deja el resultado en cada entrada (atributo `alert`), que lee la columna del inline.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not hasattr(self, "_alerts"):
+            self._alerts = evaluate_entries_alerts(queryset)
+            for entry in queryset:
+                entry.alert = self._alerts[entry.pk]
+        return queryset
+
+
 class ReportEntryInline(admin.TabularInline):
     model = ReportEntry
+    formset = ReportEntryFormSet
     extra = 0
     fields = ('question', 'answer', 'comment', 'should_trigger_alert')
     readonly_fields = ('should_trigger_alert',)
@@ -71,7 +104,9 @@ class ReportEntryInline(admin.TabularInline):
     verbose_name_plural = "Entradas"
 
     def should_trigger_alert(self, obj):
-        return obj.should_trigger_alert()
+        # Calculada por ReportEntryFormSet para todo el reporte; no consulta por fila
+        alert = getattr(obj, "alert", None)
+        return obj.should_trigger_alert() if alert is None else alert
     should_trigger_alert.boolean = True
     should_trigger_alert.short_description = "Alerta?"
 
@@ -0,0 +1,27 @@
+from main.jobs import register_job
+
+from .models.report import Report
+from .models.unit import UnitImage
+from .utils.image_renditions import RENDITION_FORMATS, UNIT_IMAGE_RENDITIONS, get_unit_image_rendition
+from .utils.report_pdf import OFFLINE_BASE_URL, get_report_for_pdf, get_report_pdf_path
+
+
+@register_job("major_equipment.render_report_pdf")
+def render_report_pdf(report_id: int):
+    """Genera el PDF del reporte en el caché en disco, para que la descarga sea inmediata."""
+    try:
+        report = get_report_for_pdf(report_id)
+    except Report.DoesNotExist:
+        return
+    get_report_pdf_path(report, OFFLINE_BASE_URL)
+
+
+@register_job("major_equipment.generate_unit_image_renditions")
+def generate_unit_image_renditions(image_id: int):
+    """Genera todas las versiones reducidas (tamaños × formatos) de una imagen de unidad."""
+    image = UnitImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image:
+        return
+    for size in UNIT_IMAGE_RENDITIONS:
+        for image_format in RENDITION_FORMATS:
+            get_unit_image_rendition(image.image, size, image_format)
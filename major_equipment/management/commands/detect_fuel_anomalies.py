@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from major_equipment.utils.fuel_anomalies import run_fuel_anomaly_detection
+
+
+class Command(BaseCommand):
+    help = (
+        'Detecta anomalías en las cargas de combustible registradas desde la última ejecución '
+        '(sobre capacidad, kilometraje menor, rendimiento atípico y cargas duplicadas).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Analiza todo el historial y reemplaza las anomalías registradas.',
+        )
+
+    def handle(self, *args, **options):
+        run = run_fuel_anomaly_detection(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{run.processed} cargas analizadas, {run.flagged} anomalías registradas '
+            f'(hasta la carga #{run.last_fuel_log_id}).'
+        ))
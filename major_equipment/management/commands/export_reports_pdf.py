@@ -0,0 +1,56 @@
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from major_equipment.models import Unit
+from major_equipment.utils.calendar import get_month_range
+from major_equipment.utils.report_pdf import (
+    OFFLINE_BASE_URL, get_unit_reports_for_pdf, render_reports_pdf,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un solo PDF con todos los reportes de una unidad en un mes '
+        '(--year/--month) o en un rango de fechas (--start/--end).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('unit', help='Número de unidad (unit_number).')
+        parser.add_argument('--year', type=int, help='Año del mes a exportar (por defecto, el actual).')
+        parser.add_argument('--month', type=int, help='Mes a exportar (por defecto, el actual).')
+        parser.add_argument('--start', type=date.fromisoformat, help='Fecha inicial AAAA-MM-DD.')
+        parser.add_argument('--end', type=date.fromisoformat, help='Fecha final AAAA-MM-DD (inclusive).')
+        parser.add_argument('-o', '--output', help='Ruta del PDF a generar.')
+
+    def handle(self, *args, **options):
+        try:
+            unit = Unit.objects.get(unit_number=options['unit'])
+        except Unit.DoesNotExist:
+            raise CommandError(f'La unidad "{options["unit"]}" no existe.')
+
+        if options['start'] or options['end']:
+            if not (options['start'] and options['end']):
+                raise CommandError('Debe indicar --start y --end.')
+            start, end = options['start'], options['end']
+            if end < start:
+                raise CommandError('La fecha final debe ser posterior a la inicial.')
+        else:
+            today = timezone.localdate()
+            try:
+                start, end = get_month_range(options['year'] or today.year, options['month'] or today.month)
+            except ValueError:
+                raise CommandError('Mes inválido.')
+
+        reports = list(get_unit_reports_for_pdf(unit, start, end))
+        if not reports:
+            self.stdout.write(self.style.WARNING(f'No hay reportes de {unit} entre {start} y {end}.'))
+            return
+
+        pdf_file = render_reports_pdf(unit, reports, f'{start:%d-%m-%Y} al {end:%d-%m-%Y}', OFFLINE_BASE_URL)
+
+        output = Path(options['output'] or f'reportes_{unit.unit_number}_{start}_{end}.pdf')
+        output.write_bytes(pdf_file)
+        self.stdout.write(self.style.SUCCESS(f'{len(reports)} reportes exportados a {output}.'))
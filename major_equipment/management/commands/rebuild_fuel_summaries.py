@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from major_equipment.models import Unit
+from major_equipment.utils.fuel_summary import rebuild_fuel_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye desde FuelLog los resúmenes mensuales de combustible por unidad '
+        '(normalmente se mantienen con señales; usar tras cargas masivas o ediciones con update()).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('units', nargs='*', help='Números de unidad (unit_number); por defecto, todas.')
+
+    def handle(self, *args, **options):
+        unit_ids = None
+        if options['units']:
+            unit_ids = list(Unit.objects.filter(unit_number__in=options['units']).values_list('id', flat=True))
+            if len(unit_ids) != len(set(options['units'])):
+                raise CommandError('Alguna de las unidades indicadas no existe.')
+
+        created = rebuild_fuel_summaries(unit_ids)
+        self.stdout.write(self.style.SUCCESS(f'{created} resúmenes mensuales reconstruidos.'))
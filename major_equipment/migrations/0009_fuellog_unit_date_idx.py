@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('major_equipment', '0008_reportitemoption_triggers_alert_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fuellog',
+            index=models.Index(fields=['unit', 'date'], name='fuellog_unit_date_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-17 18:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('major_equipment', '0009_fuellog_unit_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuelAnomalyRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_fuel_log_id', models.PositiveIntegerField(verbose_name='Última carga analizada')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Cargas analizadas')),
+                ('flagged', models.PositiveIntegerField(default=0, verbose_name='Anomalías registradas')),
+                ('finished_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de ejecución')),
+            ],
+            options={
+                'verbose_name': 'Ejecución del detector de anomalías',
+                'verbose_name_plural': 'Ejecuciones del detector de anomalías',
+                'ordering': ['-finished_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FuelAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.IntegerField(choices=[(1, 'Supera la capacidad del estanque'), (2, 'Kilometraje menor al de la carga anterior'), (3, 'Rendimiento atípico'), (4, 'Posible carga duplicada')], verbose_name='Tipo de anomalía')),
+                ('detail', models.CharField(blank=True, max_length=300, verbose_name='Detalle')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de detección')),
+                ('fuel_log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='major_equipment.fuellog', verbose_name='Carga de combustible')),
+            ],
+            options={
+                'verbose_name': 'Anomalía de combustible',
+                'verbose_name_plural': 'Anomalías de combustible',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fuelanomaly',
+            constraint=models.UniqueConstraint(fields=('fuel_log', 'kind'), name='unique_anomaly_kind_per_fuel_log'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-17 18:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('major_equipment', '0010_fuel_anomalies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuelMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Año')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Mes')),
+                ('loads', models.PositiveIntegerField(default=0, verbose_name='Cargas')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Cantidad (L)')),
+                ('cost', models.BigIntegerField(default=0, verbose_name='Costo (CLP)')),
+                ('distance', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Distancia recorrida (km)')),
+                ('last_mileage', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True, verbose_name='Kilometraje de la última carga')),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fuel_summaries', to='major_equipment.unit', verbose_name='Unidad')),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual de combustible',
+                'verbose_name_plural': 'Resúmenes mensuales de combustible',
+                'ordering': ['unit', 'year', 'month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fuelmonthlysummary',
+            constraint=models.UniqueConstraint(fields=('unit', 'year', 'month'), name='unique_fuel_summary_per_unit_month'),
+        ),
+    ]
@@ -37,6 +37,10 @@ class FuelLog(models.Model):
                 name="unique_guide_per_station"
             )
         ]
+        indexes = [
+            # Cargas de una unidad por rango de fechas (vista mensual, analítica)
+            models.Index(fields=["unit", "date"], name="fuellog_unit_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.station.label} #{self.guide_number} — {self.date:%d/%m/%Y %H:%M}"
@@ -44,3 +48,83 @@ class FuelLog(models.Model):
     @property
     def ticket_url(self):
         return self.ticket.url if self.ticket else None
+
+
+class FuelAnomalyKind(models.IntegerChoices):
+    """
+    ENUM de tipos de anomalía en una carga de combustible.
+    """
+    OVER_CAPACITY = 1, 'Supera la capacidad del estanque'
+    ODOMETER_REGRESSION = 2, 'Kilometraje menor al de la carga anterior'
+    EFFICIENCY_OUTLIER = 3, 'Rendimiento atípico'
+    DUPLICATE = 4, 'Posible carga duplicada'
+
+
+class FuelAnomaly(models.Model):
+    """Anomalía detectada en una carga de combustible (ver detect_fuel_anomalies)."""
+    fuel_log   = models.ForeignKey(FuelLog, on_delete=models.CASCADE, related_name="anomalies", verbose_name="Carga de combustible")
+    kind       = models.IntegerField(choices=FuelAnomalyKind.choices, verbose_name="Tipo de anomalía")
+    detail     = models.CharField(max_length=300, blank=True, verbose_name="Detalle")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de detección")
+
+    class Meta:
+        verbose_name        = "Anomalía de combustible"
+        verbose_name_plural = "Anomalías de combustible"
+        ordering            = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fuel_log", "kind"],
+                name="unique_anomaly_kind_per_fuel_log"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} — {self.fuel_log}"
+
+
+class FuelAnomalyRun(models.Model):
+    """
+    Ejecución del detector de anomalías. La última ejecución marca hasta qué carga
+    (last_fuel_log_id) ya se analizó, para que la siguiente procese solo las nuevas.
+    """
+    last_fuel_log_id = models.PositiveIntegerField(verbose_name="Última carga analizada")
+    processed        = models.PositiveIntegerField(default=0, verbose_name="Cargas analizadas")
+    flagged          = models.PositiveIntegerField(default=0, verbose_name="Anomalías registradas")
+    finished_at      = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de ejecución")
+
+    class Meta:
+        verbose_name        = "Ejecución del detector de anomalías"
+        verbose_name_plural = "Ejecuciones del detector de anomalías"
+        ordering            = ["-finished_at"]
+
+    def __str__(self):
+        return f"{self.finished_at:%d/%m/%Y %H:%M} — hasta carga #{self.last_fuel_log_id}"
+
+
+class FuelMonthlySummary(models.Model):
+    """
+    Totales de combustible de una unidad en un mes, mantenidos por señales sobre
+    FuelLog (ver utils/fuel_summary.py) y reconstruibles con rebuild_fuel_summaries.
+    """
+    unit     = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name="fuel_summaries", verbose_name="Unidad")
+    year     = models.PositiveSmallIntegerField(verbose_name="Año")
+    month    = models.PositiveSmallIntegerField(verbose_name="Mes")
+    loads    = models.PositiveIntegerField(default=0, verbose_name="Cargas")
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Cantidad (L)")
+    cost     = models.BigIntegerField(default=0, verbose_name="Costo (CLP)")
+    distance = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Distancia recorrida (km)")
+    last_mileage = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True, verbose_name="Kilometraje de la última carga")
+
+    class Meta:
+        verbose_name        = "Resumen mensual de combustible"
+        verbose_name_plural = "Resúmenes mensuales de combustible"
+        ordering            = ["unit", "year", "month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["unit", "year", "month"],
+                name="unique_fuel_summary_per_unit_month"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.unit} — {self.month:02d}/{self.year}"
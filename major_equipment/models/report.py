@@ -98,6 +98,24 @@ class ReportItemOption(models.Model):
     def __str__(self):
         return self.value
 
+def numeric_rule_triggered(min_value, max_value, value):
+    """
+    Evalúa una regla numérica (min_value / max_value opcionales) sobre un valor.
+    Compartida por NumericAlertRule y la tabla compilada de utils.alert_rules.
+    """
+    try:
+        val = int(value)
+    except (TypeError, ValueError):
+        return False
+
+    if min_value is not None and val < min_value:
+        return True
+    if max_value is not None and val > max_value:
+        return True
+    if min_value is not None and max_value is not None:
+        return min_value <= val <= max_value
+    return False
+
 class NumericAlertRule(models.Model):
     """
     Reglas de alerta para respuestas numéricas.
@@ -136,18 +154,7 @@ class NumericAlertRule(models.Model):
         """
         Devuelve True si el valor viola alguna condición
         """
-        try:
-            val = int(value)
-        except (TypeError, ValueError):
-            return False
-        
-        if self.min_value is not None and val < self.min_value:
-            return True
-        if self.max_value is not None and val > self.max_value:
-            return True
-        if self.min_value is not None and self.max_value is not None:
-            return self.min_value <= val <= self.max_value
-        return False
+        return numeric_rule_triggered(self.min_value, self.max_value, value)
 
 class Report(models.Model):
     """
@@ -197,6 +204,29 @@ class Report(models.Model):
     def __str__(self):
         return f"Reporte {self.unit} - {self.date}"
 
+def validate_answer(question_type, answer, options=()):
+    """
+    Valida una respuesta según el tipo de pregunta. Lanza ValidationError si no es válida.
+    Para opción múltiple, `options` contiene los valores permitidos.
+    """
+    val = (answer or "").strip()
+
+    if question_type == QuestionType.GOOD_BAD:
+        if val not in ['Bueno', 'Malo']:
+            raise ValidationError('Para preguntas Bueno/Malo la respuesta debe ser “Bueno” o “Malo”.')
+
+    elif question_type == QuestionType.MULTIPLE_CHOICE:
+        if val not in options:
+            raise ValidationError(f"Respuesta inválida. Debe ser una de: {', '.join(options)}")
+
+    elif question_type == QuestionType.NUMERIC:
+        try:
+            float(val)
+        except ValueError:
+            raise ValidationError('Para preguntas numéricas la respuesta debe ser un número.')
+    else:
+        raise ValidationError('Tipo de pregunta no soportado.')
+
 class ReportEntry(models.Model):
     report = models.ForeignKey(
         Report,
@@ -231,47 +261,18 @@ class ReportEntry(models.Model):
     def clean(self):
         super().clean()
         qt = self.question.question_type
-        val = (self.answer or "").strip()
-
-        if qt == QuestionType.GOOD_BAD:
-            if val not in ['Bueno', 'Malo']:
-                raise ValidationError('Para preguntas Bueno/Malo la respuesta debe ser “Bueno” o “Malo”.')
-        
-        elif qt == QuestionType.MULTIPLE_CHOICE:
-            opciones = [opt.value for opt in self.question.options.all()]
-            if val not in opciones:
-                raise ValidationError(f"Respuesta inválida. Debe ser una de: {', '.join(opciones)}")
-        
-        elif qt == QuestionType.NUMERIC:
-            try:
-                float(val)
-            except ValueError:
-                raise ValidationError('Para preguntas numéricas la respuesta debe ser un número.')
-        else:
-            raise ValidationError('Tipo de pregunta no soportado.')
+        options = []
+        if qt == QuestionType.MULTIPLE_CHOICE:
+            options = [opt.value for opt in self.question.options.all()]
+        validate_answer(qt, self.answer, options)
 
     def should_trigger_alert(self):
         """
         Determina si esta entrada debe generar alerta según el tipo de pregunta.
+        Usa la tabla de reglas compilada de la pregunta (utils.alert_rules), en caché.
         """
-        val = (self.answer or "").strip()
-        qt = self.question.question_type
-
-        if qt == QuestionType.GOOD_BAD:
-            # Alerta en "Malo"
-            return val == "Malo"
-        
-        elif qt == QuestionType.MULTIPLE_CHOICE:
-            # Usa el flag de cada opción
-            return self.question.options.filter(value=val, triggers_alert=True).exists()
-        
-        elif qt == QuestionType.NUMERIC:
-            # Consulta cada regla numerica
-            for rule in self.question.numeric_alert_rules.all():
-                if rule.is_triggered(val):
-                    return True
-        
-        return False
+        from major_equipment.utils.alert_rules import get_alert_rules
+        return get_alert_rules([self.question_id])[self.question_id].triggers(self.answer)
         
     def __str__(self):
         return f"{self.report} - {self.question.label}: {self.answer}"
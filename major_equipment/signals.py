@@ -1,3 +1,112 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models.report import Report, ReportEntry, ReportTemplateItem, ReportItemOption, NumericAlertRule
+from .utils.report_pdf import invalidate_report_pdf
+from .utils.alert_rules import invalidate_alert_rules
+from .utils.compliance import invalidate_compliance
+from .utils.calendar import invalidate_year_calendar
+from .models.fuel_log import FuelLog
+from .utils.fuel_summary import refresh_fuel_summaries_for
+from .models.unit import UnitImage
+from .utils.image_renditions import delete_unit_image_renditions
+from main.jobs import enqueue_on_commit
+
+
+# Cuando cambia un reporte o alguna de sus entradas, su PDF en caché deja de ser válido
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def invalidate_report_pdf_on_report_change(sender, instance: Report, **kwargs):
+    invalidate_report_pdf(instance.pk)
+
+
+# Cuando se guarda o elimina un reporte, la matriz de cumplimiento y el calendario anual de su mes dejan de ser válidos
+# (también los del mes y la unidad anteriores a la edición, si el reporte cambió de unidad o de fecha)
+@receiver(pre_save, sender=Report)
+def remember_report_period(sender, instance: Report, **kwargs):
+    instance._previous_period = None
+    if instance.pk:
+        instance._previous_period = (
+            Report.objects.filter(pk=instance.pk).values_list("unit_id", "date").first()
+        )
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+def invalidate_compliance_on_report_change(sender, instance: Report, **kwargs):
+    invalidate_compliance(instance.date)
+    invalidate_year_calendar(instance.unit_id, instance.date)
+    previous = getattr(instance, "_previous_period", None)
+    if previous and previous != (instance.unit_id, instance.date):
+        previous_unit_id, previous_date = previous
+        if (previous_date.year, previous_date.month) != (instance.date.year, instance.date.month):
+            invalidate_compliance(previous_date)
+        invalidate_year_calendar(previous_unit_id, previous_date)
+
+
+@receiver(post_save, sender=ReportEntry)
+@receiver(post_delete, sender=ReportEntry)
+def invalidate_report_pdf_on_entry_change(sender, instance: ReportEntry, **kwargs):
+    invalidate_report_pdf(instance.report_id)
+
+
+# Los resúmenes mensuales de combustible se recalculan para el mes de la carga (y el
+# mes anterior a la edición, si la carga cambió de unidad o de fecha)
+@receiver(pre_save, sender=FuelLog)
+def remember_fuel_log_period(sender, instance: FuelLog, **kwargs):
+    instance._previous_period = None
+    if instance.pk:
+        instance._previous_period = (
+            FuelLog.objects.filter(pk=instance.pk).values_list("unit_id", "date").first()
+        )
+
+
+@receiver(post_save, sender=FuelLog)
+@receiver(post_delete, sender=FuelLog)
+def refresh_fuel_summary_on_fuel_log_change(sender, instance: FuelLog, **kwargs):
+    refresh_fuel_summaries_for(instance.unit_id, instance.date)
+    previous = getattr(instance, "_previous_period", None)
+    if previous and previous != (instance.unit_id, instance.date):
+        refresh_fuel_summaries_for(*previous)
+
+
+# Al eliminar una imagen de unidad (o reemplazar su archivo) se eliminan sus versiones reducidas
+@receiver(pre_save, sender=UnitImage)
+def delete_replaced_unit_image_renditions(sender, instance: UnitImage, **kwargs):
+    if instance.pk:
+        previous = UnitImage.objects.filter(pk=instance.pk).first()
+        if previous and previous.image.name != instance.image.name:
+            delete_unit_image_renditions(previous.image)
+            instance._image_replaced = True
+
+
+# Las versiones reducidas de una imagen nueva se generan en segundo plano
+@receiver(post_save, sender=UnitImage)
+def enqueue_unit_image_renditions(sender, instance: UnitImage, created, **kwargs):
+    if instance.image and (created or getattr(instance, "_image_replaced", False)):
+        enqueue_on_commit("major_equipment.generate_unit_image_renditions", image_id=instance.pk)
+
+
+@receiver(post_delete, sender=UnitImage)
+def delete_unit_image_renditions_on_delete(sender, instance: UnitImage, **kwargs):
+    delete_unit_image_renditions(instance.image)
+
+
+# Cuando cambian las opciones, reglas o el tipo de una pregunta, su tabla de alertas compilada deja de ser válida
+@receiver(post_save, sender=ReportItemOption)
+@receiver(post_delete, sender=ReportItemOption)
+@receiver(post_save, sender=NumericAlertRule)
+@receiver(post_delete, sender=NumericAlertRule)
+def invalidate_alert_rules_on_rule_change(sender, instance, **kwargs):
+    invalidate_alert_rules(instance.question_id)
+
+
+@receiver(post_save, sender=ReportTemplateItem)
+@receiver(post_delete, sender=ReportTemplateItem)
+def invalidate_alert_rules_on_item_change(sender, instance: ReportTemplateItem, **kwargs):
+    invalidate_alert_rules(instance.pk)
+
+
 # import os
 # import logging
 # from textwrap import dedent
@@ -1,3 +1,1077 @@
-from django.test import TestCase
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from docs.models import FileVencible
+from firebrigade.models import Entity, EntityType
+from major_equipment.models import (
+    FuelAnomaly, FuelAnomalyKind, FuelAnomalyRun, FuelLog, FuelMonthlySummary, ItemCategory, NumericAlertRule, QuestionType, Report, ReportEntry, ReportItemOption,
+    ReportTemplateItem, Station, Unit, UnitImage,
+)
+from major_equipment.utils import report_pdf
+from major_equipment.utils.alert_rules import evaluate_entries_alerts
+from major_equipment.utils.alert_stats import get_alert_statistics
+from major_equipment.utils.calendar import get_month_range, get_year_report_days
+from major_equipment.utils.fuel import get_fuel_month_summary, get_month_datetime_range
+from major_equipment.utils.fuel_anomalies import run_fuel_anomaly_detection
+from major_equipment.utils.fuel_summary import get_fleet_fuel_summary, rebuild_fuel_summaries
+from major_equipment.utils.fuel_efficiency import get_fuel_efficiency_series, get_fuel_efficiency_summary
+from major_equipment.utils.expirations import BUCKET_EXPIRED, get_expiration_dashboard
+from major_equipment.utils.compliance import (
+    STATE_DONE, STATE_FUTURE, STATE_MISSING, get_compliance_matrix,
+)
+from major_equipment.utils.pdf_assets import offline_url_fetcher
+from major_equipment.utils.unit_cards import (
+    BADGE_EXPIRED, BADGE_MISSING, BADGE_VALID, get_unit_cards,
+)
+
+
+def create_unit(entity, number, **kwargs):
+    """Crea una unidad mínima para las pruebas."""
+    return Unit.objects.create(
+        unit_number=str(number),
+        description=f"Unidad {number}",
+        plate_number=f"AB{number:04d}",
+        entity=entity,
+        **kwargs,
+    )
+
+
+class UnitCardsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        today = timezone.now().date()
+        cls.valid_doc = FileVencible.objects.create(
+            file="documentos/soap.pdf", short_name="SOAP", expiration_date=today + timedelta(days=10)
+        )
+        cls.expired_doc = FileVencible.objects.create(
+            file="documentos/permiso.pdf", short_name="Permiso", expiration_date=today - timedelta(days=1)
+        )
+
+    def add_units(self, count, start=1):
+        for number in range(start, start + count):
+            unit = create_unit(
+                self.entity, number,
+                soap=self.valid_doc,
+                vehicle_permit=self.expired_doc,
+                technical_inspection=self.valid_doc,
+            )
+            UnitImage.objects.create(unit=unit, image=f"unit_images/{number}-a.jpg")
+            UnitImage.objects.create(unit=unit, image=f"unit_images/{number}-b.jpg")
+
+    def test_badges_and_first_image(self):
+        unit = create_unit(self.entity, 1, soap=self.valid_doc, vehicle_permit=self.expired_doc)
+        first = UnitImage.objects.create(unit=unit, image="unit_images/1-a.jpg")
+        UnitImage.objects.create(unit=unit, image="unit_images/1-b.jpg")
+
+        [card] = get_unit_cards(Unit.objects.all())
+
+        self.assertEqual(card["unit"], unit)
+        self.assertEqual(card["image_id"], first.pk)
+        self.assertEqual(card["soap_class"], BADGE_VALID)
+        self.assertEqual(card["vehicle_permit_class"], BADGE_EXPIRED)
+        self.assertEqual(card["technical_inspection_class"], BADGE_MISSING)
+
+    def test_unit_without_images(self):
+        create_unit(self.entity, 1)
+
+        [card] = get_unit_cards(Unit.objects.all())
+
+        self.assertIsNone(card["image_id"])
+
+    def test_query_count_is_constant(self):
+        self.add_units(2)
+        with self.assertNumQueries(1):
+            cards = get_unit_cards(Unit.objects.order_by("unit_number"))
+            [str(card["unit"].entity) for card in cards]
+
+        self.add_units(10, start=3)
+        with self.assertNumQueries(1):
+            cards = get_unit_cards(Unit.objects.order_by("unit_number"))
+            [str(card["unit"].entity) for card in cards]
+
+        self.assertEqual(len(cards), 12)
+
+
+@override_settings(REPORT_PDF_CACHE_DIR=tempfile.mkdtemp())
+class ReportPdfCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.author = User.objects.create_user("bombero")
+        cls.unit = create_unit(entity, 1)
+        cls.item = ReportTemplateItem.objects.create(
+            label="Luces", category=ItemCategory.objects.create(label="Eléctrico")
+        )
+
+    def setUp(self):
+        self.report = Report.objects.create(unit=self.unit, author=self.author)
+        self.entry = ReportEntry.objects.create(report=self.report, question=self.item, answer="Bueno")
+        self.addCleanup(report_pdf.invalidate_report_pdf, self.report.pk)
+        patcher = mock.patch.object(report_pdf, "render_report_pdf", return_value=b"%PDF-1.7")
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_pdf_path(self):
+        report = report_pdf.get_report_for_pdf(self.report.pk)
+        return report_pdf.get_report_pdf_path(report, base_url="/")
+
+    def test_repeated_downloads_are_served_from_disk(self):
+        first = self.get_pdf_path()
+        second = self.get_pdf_path()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.read_bytes(), b"%PDF-1.7")
+        self.render.assert_called_once()
+
+    def test_entry_change_invalidates_pdf(self):
+        first = self.get_pdf_path()
+
+        self.entry.answer = "Malo"
+        self.entry.save()
+
+        self.assertFalse(first.exists())
+        second = self.get_pdf_path()
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.render.call_count, 2)
+
+
+class ReportsBatchPdfTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.author = User.objects.create_user("bombero")
+        cls.unit = create_unit(entity, 1)
+        category = ItemCategory.objects.create(label="General")
+        cls.items = [
+            ReportTemplateItem.objects.create(label=f"Pregunta {n}", category=category)
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        patcher = mock.patch.object(report_pdf, "write_pdf", return_value=b"%PDF-1.7")
+        self.write_pdf = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_reports(self, days):
+        for day in days:
+            report = Report.objects.create(unit=self.unit, author=self.author, date=date(2025, 3, day))
+            for item in self.items:
+                ReportEntry.objects.create(report=report, question=item, answer="Bueno")
+
+    def render_month(self):
+        start, end = get_month_range(2025, 3)
+        reports = report_pdf.get_unit_reports_for_pdf(self.unit, start, end)
+        return report_pdf.render_reports_pdf(self.unit, reports, "Marzo 2025", report_pdf.OFFLINE_BASE_URL)
+
+    def test_single_layout_pass_with_fixed_queries(self):
+        self.add_reports([1, 2])
+        with self.assertNumQueries(2):
+            self.render_month()
+
+        self.add_reports(range(3, 20))
+        with self.assertNumQueries(2):
+            self.render_month()
+
+        html_string = self.write_pdf.call_args.args[0]
+        self.assertEqual(html_string.count('class="report-page"'), 19)
+        self.assertEqual(self.write_pdf.call_count, 2)
+
+    def test_reports_outside_range_are_excluded(self):
+        self.add_reports([1])
+        Report.objects.create(unit=self.unit, author=self.author, date=date(2025, 4, 1))
+
+        self.render_month()
+
+        html_string = self.write_pdf.call_args.args[0]
+        self.assertEqual(html_string.count('class="report-page"'), 1)
+
+
+class CreateReportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.category = ItemCategory.objects.create(label="General")
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_checklist(self, unit, size):
+        """Crea `size` ítems de cada tipo para la unidad y retorna las respuestas válidas."""
+        data = {}
+        for n in range(size):
+            good_bad = ReportTemplateItem.objects.create(label=f"Estado {n}", category=self.category)
+            choice = ReportTemplateItem.objects.create(
+                label=f"Nivel {n}", category=self.category, question_type=QuestionType.MULTIPLE_CHOICE
+            )
+            ReportItemOption.objects.create(question=choice, value="Lleno")
+            ReportItemOption.objects.create(question=choice, value="Vacío", triggers_alert=True)
+            numeric = ReportTemplateItem.objects.create(
+                label=f"Presión {n}", category=self.category, question_type=QuestionType.NUMERIC
+            )
+            for item in (good_bad, choice, numeric):
+                item.units.add(unit)
+            data[f"q_{good_bad.id}"] = "Bueno"
+            data[f"q_{choice.id}"] = "Lleno"
+            data[f"q_{numeric.id}"] = "32"
+        return data
+
+    def post_report(self, unit, data):
+        url = f"{reverse('major_equipment:create_report')}?unit={unit.id}"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, secure=True)
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_checklist_size(self):
+        small_unit = create_unit(self.entity, 1)
+        large_unit = create_unit(self.entity, 2)
+
+        response, small_queries = self.post_report(small_unit, self.create_checklist(small_unit, 1))
+        self.assertEqual(response.status_code, 302)
+        response, large_queries = self.post_report(large_unit, self.create_checklist(large_unit, 20))
+        self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(ReportEntry.objects.filter(report__unit=large_unit).count(), 60)
+
+    def test_invalid_answers_do_not_create_report(self):
+        unit = create_unit(self.entity, 1)
+        data = self.create_checklist(unit, 1)
+        choice = ReportTemplateItem.objects.get(label="Nivel 0")
+        data[f"q_{choice.id}"] = "Medio"
+
+        response, _ = self.post_report(unit, data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Report.objects.filter(unit=unit).exists())
+        errors = [str(m) for m in response.context["messages"]]
+        self.assertEqual(errors, ["Nivel 0: Respuesta inválida. Debe ser una de: Lleno, Vacío"])
+
+
+class AlertRulesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        author = User.objects.create_user("bombero")
+        category = ItemCategory.objects.create(label="General")
+        cls.report = Report.objects.create(unit=create_unit(entity, 1), author=author)
+
+        cls.good_bad = ReportTemplateItem.objects.create(label="Luces", category=category)
+        cls.choice = ReportTemplateItem.objects.create(
+            label="Nivel de aceite", category=category, question_type=QuestionType.MULTIPLE_CHOICE
+        )
+        ReportItemOption.objects.create(question=cls.choice, value="Normal")
+        cls.low = ReportItemOption.objects.create(question=cls.choice, value="Bajo", triggers_alert=True)
+        cls.numeric = ReportTemplateItem.objects.create(
+            label="Presión", category=category, question_type=QuestionType.NUMERIC
+        )
+        NumericAlertRule.objects.create(question=cls.numeric, min_value=30)
+
+    def setUp(self):
+        cache.clear()
+
+    def add_entry(self, question, answer):
+        return ReportEntry.objects.create(report=self.report, question=question, answer=answer)
+
+    def test_rules_match_entry_answers(self):
+        cases = [
+            (self.good_bad, "Bueno", False),
+            (self.good_bad, "Malo", True),
+            (self.choice, "Normal", False),
+            (self.choice, "Bajo", True),
+            (self.numeric, "35", False),
+            (self.numeric, "20", True),
+            (self.numeric, "abc", False),
+        ]
+        for question, answer, expected in cases:
+            entry = ReportEntry(question=question, answer=answer)
+            with self.subTest(question=question.label, answer=answer):
+                self.assertIs(entry.should_trigger_alert(), expected)
+
+    def test_report_alerts_are_evaluated_in_memory(self):
+        entries = [self.add_entry(self.good_bad, "Malo"), self.add_entry(self.choice, "Normal")]
+        evaluate_entries_alerts(entries)
+
+        with self.assertNumQueries(0):
+            alerts = evaluate_entries_alerts(entries)
+            [entry.should_trigger_alert() for entry in entries]
+
+        self.assertEqual(alerts, {entries[0].pk: True, entries[1].pk: False})
+
+    def test_admin_inline_evaluates_alerts_once_per_report(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        url = reverse("admin:major_equipment_report_change", args=[self.report.pk])
+
+        self.add_entry(self.good_bad, "Malo")
+        self.add_entry(self.choice, "Bajo")
+        self.add_entry(self.numeric, "20")
+        other = ReportTemplateItem.objects.create(label="Bocina", category=self.good_bad.category)
+        self.add_entry(other, "Bueno")
+        cache.clear()
+        with mock.patch(
+            "major_equipment.admin.evaluate_entries_alerts", side_effect=evaluate_entries_alerts,
+        ) as evaluate, CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(evaluate.call_count, 1)
+        self.assertContains(response, "icon-yes.svg", count=3)
+        # Las reglas se compilan una vez para todo el reporte, no por fila
+        rule_queries = [q for q in ctx.captured_queries if '"triggers_alert"' in q["sql"]]
+        self.assertEqual(len(rule_queries), 1)
+
+    def test_option_change_invalidates_rules(self):
+        entry = self.add_entry(self.choice, "Bajo")
+        self.assertTrue(entry.should_trigger_alert())
+
+        self.low.triggers_alert = False
+        self.low.save()
+
+        self.assertFalse(entry.should_trigger_alert())
+
+    def test_alert_statistics_by_unit_and_question(self):
+        other_unit = create_unit(self.report.unit.entity, 2)
+        answers = {1: ("Malo", "20"), 2: ("Bueno", "35"), 3: ("Malo", "35")}
+        for day, (light, pressure) in answers.items():
+            for unit in (self.report.unit, other_unit):
+                report = Report.objects.create(unit=unit, author=self.report.author, date=date(2025, 1, day))
+                ReportEntry.objects.create(report=report, question=self.good_bad, answer=light)
+                ReportEntry.objects.create(report=report, question=self.numeric, answer=pressure)
+        # Fuera del rango
+        report = Report.objects.create(unit=other_unit, author=self.report.author, date=date(2025, 2, 1))
+        ReportEntry.objects.create(report=report, question=self.good_bad, answer="Malo")
+
+        stats = get_alert_statistics(date(2025, 1, 1), date(2025, 1, 31))
+
+        self.assertEqual(stats["units"][other_unit.pk], {"entries": 6, "alerts": 3, "rate": 0.5})
+        self.assertEqual(stats["questions"][self.good_bad.pk], {"entries": 6, "alerts": 4, "rate": 4 / 6})
+        self.assertEqual(stats["questions"][self.numeric.pk], {"entries": 6, "alerts": 2, "rate": 2 / 6})
+
+
+class ExpirationDashboardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2025, 3, 10)
+        first = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        second = Entity.objects.create(name="Segunda Compañía", type=EntityType.COMPANY)
+        cls.first = first
+
+        def document(name, days):
+            return FileVencible.objects.create(
+                file=f"documentos/{name}.pdf", short_name=name, expiration_date=cls.today + timedelta(days=days),
+            )
+
+        shared = document("SOAP flota", 5)
+        create_unit(first, 1, soap=shared, technical_inspection=document("RT 1", -3))
+        create_unit(second, 2, soap=shared, vehicle_permit=document("PC 2", 45))
+        create_unit(first, 3, vehicle_permit=document("PC 3", 400))
+        document("Sin unidad", 1)
+
+    def bucket_names(self, buckets):
+        return {bucket["key"]: [doc["short_name"] for doc in bucket["documents"]] for bucket in buckets}
+
+    def test_buckets_and_days_in_single_query(self):
+        with self.assertNumQueries(1):
+            buckets = get_expiration_dashboard(self.today)
+
+        self.assertEqual(self.bucket_names(buckets), {
+            BUCKET_EXPIRED: ["RT 1"], "week": ["SOAP flota"], "month": [], "quarter": ["PC 2"], "later": ["PC 3"],
+        })
+        expired = buckets[0]["documents"][0]
+        self.assertEqual(expired["days_remaining"], -3)
+        shared = buckets[1]["documents"][0]
+        self.assertEqual(shared["days_remaining"], 5)
+        self.assertEqual([number for _, _, number in shared["units"]], ["1", "2"])
+
+    def test_scoped_to_entities(self):
+        buckets = get_expiration_dashboard(self.today, {self.first.pk})
+        self.assertEqual(self.bucket_names(buckets)["quarter"], [])
+        shared = buckets[1]["documents"][0]
+        self.assertEqual([number for _, _, number in shared["units"]], ["1"])
+
+    def test_view(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "x"))
+        response = self.client.get(reverse("major_equipment:expiration_dashboard"), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "SOAP flota")
+        self.assertNotContains(response, "Sin unidad")
+
+
+class ComplianceMatrixTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.units = [create_unit(entity, n) for n in (1, 2)]
+        for day in (1, 2, 5):
+            Report.objects.create(unit=cls.units[0], author=cls.user, date=date(2025, 3, day))
+        Report.objects.create(unit=cls.units[1], author=cls.user, date=date(2025, 3, 2), deleted=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_states_and_percentages(self):
+        matrix = get_compliance_matrix(self.units, 2025, 3, today=date(2025, 3, 5))
+
+        self.assertEqual(len(matrix["days"]), 31)
+        first, second = matrix["rows"]
+        self.assertEqual(first["cells"][:6], [
+            STATE_DONE, STATE_DONE, STATE_MISSING, STATE_MISSING, STATE_DONE, STATE_FUTURE,
+        ])
+        self.assertEqual((first["done"], first["expected"], first["percentage"]), (3, 5, 60.0))
+        self.assertEqual(second["cells"][:5], [STATE_MISSING] * 4 + [STATE_FUTURE])
+        self.assertEqual((second["done"], second["expected"], second["percentage"]), (0, 4, 0.0))
+
+    def test_single_query_then_cached_until_report_saved(self):
+        with self.assertNumQueries(1):
+            get_compliance_matrix(self.units, 2025, 3, today=date(2025, 4, 1))
+        with self.assertNumQueries(0):
+            get_compliance_matrix(self.units, 2025, 3, today=date(2025, 4, 1))
+
+        Report.objects.create(unit=self.units[1], author=self.user, date=date(2025, 3, 10))
+
+        with self.assertNumQueries(1):
+            matrix = get_compliance_matrix(self.units, 2025, 3, today=date(2025, 4, 1))
+        self.assertEqual(matrix["rows"][1]["cells"][9], STATE_DONE)
+
+    def test_moving_report_to_other_month_invalidates_both_months(self):
+        get_compliance_matrix(self.units, 2025, 3, today=date(2025, 5, 1))
+        get_compliance_matrix(self.units, 2025, 4, today=date(2025, 5, 1))
+
+        report = Report.objects.get(unit=self.units[0], date=date(2025, 3, 5))
+        report.date = date(2025, 4, 7)
+        report.save()
+
+        march = get_compliance_matrix(self.units, 2025, 3, today=date(2025, 5, 1))
+        april = get_compliance_matrix(self.units, 2025, 4, today=date(2025, 5, 1))
+        self.assertEqual(march["rows"][0]["cells"][4], STATE_MISSING)
+        self.assertEqual(april["rows"][0]["cells"][6], STATE_DONE)
+
+    def test_json_endpoint(self):
+        self.client.force_login(self.user)
+        url = reverse("major_equipment:compliance_matrix_json")
+
+        response = self.client.get(url, {"year": 2025, "month": 3}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual([unit["id"] for unit in data["units"]], [unit.pk for unit in self.units])
+        self.assertEqual(data["units"][0]["done"], 3)
+
+    def test_html_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("major_equipment:compliance_matrix"), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "compliance-matrix")
+
+
+class YearCalendarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.unit = create_unit(entity, 1)
+        for report_date in (date(2025, 1, 3), date(2025, 6, 1), date(2025, 6, 30), date(2024, 12, 31)):
+            Report.objects.create(unit=cls.unit, author=cls.user, date=report_date)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_one_query_for_the_year(self):
+        with self.assertNumQueries(1):
+            report_days = get_year_report_days(self.unit, 2025, today=date(2025, 7, 15))
+
+        self.assertEqual(report_days[1], 1 << 2)
+        self.assertEqual(report_days[6], 1 | 1 << 29)
+        self.assertEqual(report_days[12], 0)
+
+    def test_closed_months_are_cached(self):
+        get_year_report_days(self.unit, 2025, today=date(2025, 7, 15))
+
+        with CaptureQueriesContext(connection) as queries:
+            get_year_report_days(self.unit, 2025, today=date(2025, 7, 15))
+        self.assertEqual(len(queries), 1)
+        # Solo se consultan los meses abiertos (julio en adelante)
+        self.assertEqual(queries[0]["sql"].count("2025-07-01"), 1)
+
+        # Terminado el año, todos los meses quedan cerrados y en caché
+        get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))
+        with self.assertNumQueries(0):
+            get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))
+
+    def test_editing_old_report_invalidates_its_month(self):
+        get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))
+
+        Report.objects.create(unit=self.unit, author=self.user, date=date(2025, 6, 2))
+
+        report_days = get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))
+        self.assertEqual(report_days[6], 1 | 1 << 1 | 1 << 29)
+
+    def test_moving_report_invalidates_previous_calendar(self):
+        other_unit = create_unit(self.unit.entity, 2)
+        report = Report.objects.get(unit=self.unit, date=date(2025, 1, 3))
+        get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))
+        get_year_report_days(other_unit, 2025, today=date(2026, 1, 1))
+
+        # Otra fecha de la misma unidad
+        report.date = date(2025, 2, 4)
+        report.save()
+        report_days = get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))
+        self.assertEqual((report_days[1], report_days[2]), (0, 1 << 3))
+
+        # Otra unidad
+        report.unit = other_unit
+        report.save()
+        self.assertEqual(get_year_report_days(self.unit, 2025, today=date(2026, 1, 1))[2], 0)
+        self.assertEqual(get_year_report_days(other_unit, 2025, today=date(2026, 1, 1))[2], 1 << 3)
+
+    def test_year_view(self):
+        self.client.force_login(self.user)
+        url = reverse("major_equipment:unit_reports_year")
+
+        response = self.client.get(url, {"unit": self.unit.pk, "year": 2025}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["months"]), 12)
+        self.assertEqual(response.context["done"], 3)
+
+
+class FuelLogTestCase(TestCase):
+    """Base con una unidad, dos estaciones y un ayudante para registrar cargas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.unit = create_unit(entity, 1)
+        cls.stations = [
+            Station.objects.create(label=f"Estación {n}", address=f"Calle {n}") for n in (1, 2)
+        ]
+        cls.guide_number = 0
+
+    def add_log(self, when, quantity, cost, station=0, mileage=1000, **kwargs):
+        type(self).guide_number += 1
+        return FuelLog.objects.create(
+            guide_number=self.guide_number,
+            station=self.stations[station],
+            unit=self.unit,
+            date=timezone.make_aware(when),
+            quantity=quantity,
+            cost=cost,
+            cargo_mileage=mileage,
+            author=self.user,
+            **kwargs,
+        )
+
+
+class FuelSummaryTests(FuelLogTestCase):
+
+    def test_totals_stations_and_previous_month(self):
+        self.add_log(datetime(2025, 2, 10, 12), 50, 50000)
+        self.add_log(datetime(2025, 3, 1, 0, 30), 40, 48000)
+        self.add_log(datetime(2025, 3, 31, 23, 30), 60, 72000, station=1)
+        self.add_log(datetime(2025, 3, 15, 12), 10, 12000, deleted=True)
+        self.add_log(datetime(2025, 4, 1, 0, 0), 30, 36000)
+
+        summary = get_fuel_month_summary(self.unit, 2025, 3)
+
+        self.assertEqual(summary["totals"]["count"], 2)
+        self.assertEqual(summary["totals"]["quantity"], 100)
+        self.assertEqual(summary["totals"]["cost"], 120000)
+        self.assertEqual(summary["totals"]["price_per_liter"], 1200)
+        self.assertEqual(
+            [(s["station__label"], s["count"], s["total_cost"]) for s in summary["stations"]],
+            [("Estación 2", 1, 72000), ("Estación 1", 1, 48000)],
+        )
+        self.assertEqual(summary["previous"]["cost"], 50000)
+        self.assertEqual(summary["cost_change"], 140.0)
+        self.assertEqual(summary["quantity_change"], 100.0)
+
+    def test_view_query_count_does_not_depend_on_log_count(self):
+        self.client.force_login(self.user)
+        url = reverse("major_equipment:unit_fuel", args=[self.unit.pk])
+
+        self.add_log(datetime(2025, 3, 2, 12), 40, 48000)
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(url, {"year": 2025, "month": 3}, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+        for day in range(3, 25):
+            self.add_log(datetime(2025, 3, day, 12), 40, 48000, station=day % 2)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url, {"year": 2025, "month": 3}, secure=True)
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(response.context["fuel_cost_total"], 23 * 48000)
+
+
+class FuelEfficiencyTests(FuelLogTestCase):
+
+    def add_fill_ups(self):
+        # (día de marzo, kilometraje, litros, costo)
+        for day, mileage, quantity, cost in (
+            (1, 10000, 50, 60000),
+            (5, 10400, 40, 48000),
+            (10, 10700, 50, 60000),
+            (20, 11300, 60, 72000),
+        ):
+            self.add_log(datetime(2025, 3, day, 12), quantity, cost, mileage=mileage)
+
+    def test_series_from_consecutive_fill_ups(self):
+        self.add_fill_ups()
+
+        with self.assertNumQueries(1):
+            series = get_fuel_efficiency_series(self.unit, window=2)
+
+        self.assertEqual([row["distance"] for row in series], [None, 400, 300, 600])
+        self.assertEqual([row["km_per_liter"] for row in series], [None, 10.0, 6.0, 10.0])
+        self.assertEqual(series[2]["liters_per_100km"], 16.67)
+        self.assertEqual(series[1]["cost_per_km"], 120.0)
+        # Ventana de 2 cargas: (10700 - 10000) / (40 + 50)
+        self.assertEqual([row["rolling_km_per_liter"] for row in series], [None, None, 7.78, 8.18])
+
+        summary = get_fuel_efficiency_summary(series)
+        self.assertEqual(summary["distance"], 1300)
+        self.assertEqual(summary["km_per_liter"], 8.67)
+
+    def test_range_keeps_previous_fill_up_for_distance(self):
+        self.add_fill_ups()
+        self.add_log(datetime(2025, 4, 2, 12), 30, 36000, mileage=11600)
+
+        series = get_fuel_efficiency_series(self.unit, *get_month_datetime_range(2025, 4), window=3)
+
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]["distance"], 300)
+        self.assertEqual(series[0]["km_per_liter"], 10.0)
+        self.assertEqual(series[0]["rolling_km_per_liter"], round(1200 / 140, 2))
+
+    def test_json_endpoint(self):
+        self.add_fill_ups()
+        self.client.force_login(self.user)
+        url = reverse("major_equipment:unit_fuel_efficiency_json", args=[self.unit.pk])
+
+        response = self.client.get(url, {"year": 2025, "month": 3}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(len(data["series"]), 4)
+        self.assertEqual(data["series"][1]["km_per_liter"], 10.0)
+        self.assertEqual(data["summary"]["distance"], 1300.0)
+
+        response = self.client.get(url, {"year": "x", "month": 3}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_login(User.objects.create_user("sin_permisos"))
+        response = self.client.get(url, {"year": 2025, "month": 3}, secure=True)
+        self.assertEqual(response.status_code, 403)
+
+    def test_odometer_regression_and_zero_distance_have_no_metrics(self):
+        self.add_fill_ups()
+        self.add_log(datetime(2025, 3, 25, 12), 40, 48000, mileage=11200)  # retroceso
+        self.add_log(datetime(2025, 3, 28, 12), 40, 48000, mileage=11200)  # sin avance
+
+        series = get_fuel_efficiency_series(self.unit, window=2)
+
+        for row in series[-2:]:
+            self.assertIsNone(row["distance"])
+            self.assertIsNone(row["km_per_liter"])
+            self.assertIsNone(row["liters_per_100km"])
+            self.assertIsNone(row["cost_per_km"])
+        # Ventanas de 2 cargas: (11200 - 10700) / (60 + 40) y sin avance neto (11200 - 11300)
+        self.assertEqual([row["rolling_km_per_liter"] for row in series[-2:]], [5.0, None])
+        self.assertEqual(get_fuel_efficiency_summary(series)["distance"], 1300)
+
+
+class FuelAnomalyTests(FuelLogTestCase):
+
+    def add_regular_fill_ups(self, count):
+        """Cargas diarias de 40 L cada 400 km (10 km/L), con costos distintos."""
+        logs = []
+        for n in range(count):
+            logs.append(self.add_log(datetime(2025, 3, n + 1, 12), 40, 48000 + n, mileage=10000 + 400 * n))
+        return logs
+
+    def kinds(self, log):
+        return set(FuelAnomaly.objects.filter(fuel_log=log).values_list("kind", flat=True))
+
+    def test_flags_each_kind(self):
+        self.unit.fuel_tank_capacity = 100
+        self.unit.save()
+        self.add_regular_fill_ups(10)
+
+        over = self.add_log(datetime(2025, 3, 20, 12), 120, 1, mileage=14800)
+        regression = self.add_log(datetime(2025, 3, 21, 12), 30, 2, mileage=14000)
+        outlier = self.add_log(datetime(2025, 3, 22, 12), 5, 3, mileage=15600)
+        duplicate = self.add_log(datetime(2025, 3, 22, 18), 5, 3, mileage=15610)
+
+        run = run_fuel_anomaly_detection()
+
+        self.assertEqual(run.processed, 14)
+        self.assertEqual(self.kinds(over), {FuelAnomalyKind.OVER_CAPACITY})
+        self.assertIn(FuelAnomalyKind.ODOMETER_REGRESSION, self.kinds(regression))
+        self.assertIn(FuelAnomalyKind.EFFICIENCY_OUTLIER, self.kinds(outlier))
+        self.assertIn(FuelAnomalyKind.DUPLICATE, self.kinds(duplicate))
+        self.assertEqual(FuelAnomaly.objects.filter(fuel_log__date__day__lt=20).count(), 0)
+
+    def test_incremental_runs_only_process_new_logs(self):
+        self.add_regular_fill_ups(10)
+        run_fuel_anomaly_detection()
+
+        FuelLog.objects.filter(pk=FuelLog.objects.order_by("pk").first().pk).update(quantity=500)
+        self.unit.fuel_tank_capacity = 100
+        self.unit.save()
+        new = self.add_log(datetime(2025, 3, 20, 12), 200, 1, mileage=20000)
+
+        run = run_fuel_anomaly_detection()
+
+        self.assertEqual(run.processed, 1)
+        self.assertEqual(set(FuelAnomaly.objects.values_list("fuel_log_id", flat=True)), {new.pk})
+
+        # --full vuelve a analizar todo el historial
+        run = run_fuel_anomaly_detection(full=True)
+        self.assertEqual(run.processed, 11)
+        self.assertEqual(FuelAnomaly.objects.filter(kind=FuelAnomalyKind.OVER_CAPACITY).count(), 2)
+
+    def test_flagged_counts_only_new_anomalies(self):
+        self.add_regular_fill_ups(10)
+        self.unit.fuel_tank_capacity = 30
+        self.unit.save()
+        self.assertEqual(run_fuel_anomaly_detection().flagged, 10)
+
+        # Sin registro de ejecuciones se vuelve a analizar todo, pero sin repetir anomalías
+        FuelAnomalyRun.objects.all().delete()
+        run = run_fuel_anomaly_detection()
+        self.assertEqual((run.processed, run.flagged), (10, 0))
+
+    def test_same_guide_number_at_other_station_is_not_duplicate(self):
+        logs = self.add_regular_fill_ups(10)
+        FuelLog.objects.filter(pk=logs[-1].pk).update(guide_number=logs[0].guide_number, station=self.stations[1])
+
+        run_fuel_anomaly_detection()
+
+        self.assertEqual(FuelAnomaly.objects.filter(kind=FuelAnomalyKind.DUPLICATE).count(), 0)
+
+
+class FuelMonthlySummaryTests(FuelLogTestCase):
+
+    def summaries(self):
+        return list(
+            FuelMonthlySummary.objects.order_by("year", "month")
+            .values_list("year", "month", "loads", "quantity", "cost", "distance")
+        )
+
+    def test_signals_keep_summaries_in_sync_with_rebuild(self):
+        self.add_log(datetime(2025, 1, 31, 12), 40, 48000, mileage=10000)
+        self.add_log(datetime(2025, 2, 1, 0, 30), 30, 36000, mileage=10300)
+        log = self.add_log(datetime(2025, 2, 20, 12), 50, 60000, mileage=10800)
+        self.add_log(datetime(2025, 3, 5, 12), 20, 24000, mileage=11000)
+
+        self.assertEqual(self.summaries(), [
+            (2025, 1, 1, 40, 48000, 0),
+            (2025, 2, 2, 80, 96000, 800),
+            (2025, 3, 1, 20, 24000, 200),
+        ])
+
+        # Mover una carga de mes actualiza ambos meses y la distancia del siguiente
+        log.date = timezone.make_aware(datetime(2025, 3, 1, 12))
+        log.save()
+        self.assertEqual(self.summaries(), [
+            (2025, 1, 1, 40, 48000, 0),
+            (2025, 2, 1, 30, 36000, 300),
+            (2025, 3, 2, 70, 84000, 700),
+        ])
+
+        signal_summaries = self.summaries()
+        self.assertEqual(rebuild_fuel_summaries(), 3)
+        self.assertEqual(self.summaries(), signal_summaries)
+
+        log.delete()
+        self.assertEqual(self.summaries()[-1], (2025, 3, 1, 20, 24000, 700))
+
+        # Con meses sin cargas entremedio, se recalcula el mes de la siguiente carga
+        self.add_log(datetime(2025, 5, 10, 12), 10, 12000, mileage=11500)
+        march = FuelLog.objects.get(cargo_mileage=11000)
+        march.cargo_mileage = 11100
+        march.save()
+        self.assertEqual(self.summaries()[-1], (2025, 5, 1, 10, 12000, 400))
+
+        signal_summaries = self.summaries()
+        rebuild_fuel_summaries()
+        self.assertEqual(self.summaries(), signal_summaries)
+
+    def test_fleet_summary_reads_only_summary_rows(self):
+        self.add_log(datetime(2025, 1, 10, 12), 40, 48000, mileage=10000)
+        self.add_log(datetime(2025, 2, 10, 12), 30, 36000, mileage=10300)
+
+        with self.assertNumQueries(1):
+            summary = get_fleet_fuel_summary(2025, Unit.objects.all())
+
+        self.assertEqual(summary["units"][self.unit.pk]["cost"], 84000)
+        self.assertEqual(summary["months"][2]["distance"], 300)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("major_equipment:fleet_fuel_summary_json"), {"year": 2025}, secure=True)
+        self.assertEqual(response.json()["units"][str(self.unit.pk)]["loads"], 2)
+
+
+class FuelExportTests(FuelLogTestCase):
+
+    def setUp(self):
+        other_entity = Entity.objects.create(name="Segunda Compañía", type=EntityType.COMPANY)
+        self.other_unit = create_unit(other_entity, 2)
+        self.add_log(datetime(2025, 1, 10, 12), 40, 48000, mileage=10000, notes="Ruta, con coma")
+        self.add_log(datetime(2025, 6, 10, 12), 30, 36000, mileage=10300)
+        self.add_log(datetime(2024, 12, 31, 12), 30, 36000, mileage=9900)
+        FuelLog.objects.create(
+            guide_number=999, station=self.stations[0], unit=self.other_unit,
+            date=timezone.make_aware(datetime(2025, 3, 1, 12)), quantity=10, cost=12000,
+            cargo_mileage=500, author=self.user,
+        )
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("major_equipment:export_fuel_logs"), params, secure=True)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_by_entity_and_year(self):
+        response, content = self.export(year=2025, entity=self.unit.entity_id, format="csv")
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(content.decode("utf-8-sig"))))
+        self.assertEqual(rows[0][0], "Fecha")
+        self.assertEqual([row[0] for row in rows[1:]], ["2025-01-10 12:00", "2025-06-10 12:00"])
+        self.assertEqual(rows[1][-1], "Ruta, con coma")
+
+    def test_xlsx_is_a_valid_workbook(self):
+        response, content = self.export(year=2025, format="xlsx")
+
+        self.assertIn("attachment", response["Content-Disposition"])
+        with zipfile.ZipFile(io.BytesIO(content)) as xlsx:
+            self.assertIsNone(xlsx.testzip())
+            sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(sheet.count("<row>"), 4)
+        self.assertIn("<v>48000</v>", sheet)
+        self.assertIn("Segunda Compañía", sheet)
+
+    def test_xlsx_strips_xml_illegal_characters(self):
+        self.add_log(datetime(2025, 7, 1, 12), 20, 24000, mileage=10500, notes="Tab\tok\x0bvertical\x00 <fin>")
+
+        _, content = self.export(year=2025, format="xlsx")
+
+        with zipfile.ZipFile(io.BytesIO(content)) as xlsx:
+            sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+        ElementTree.fromstring(sheet)  # XML bien formado
+        self.assertIn("Tab\tokvertical &lt;fin&gt;", sheet)
+
+    def test_invalid_format(self):
+        response = self.client.get(reverse("major_equipment:export_fuel_logs"), {"format": "pdf"}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+
+class ReportExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.units = [create_unit(entity, n) for n in (1, 2)]
+        category = ItemCategory.objects.create(label="General")
+        cls.good_bad = ReportTemplateItem.objects.create(label="Luces", category=category)
+        cls.choice = ReportTemplateItem.objects.create(
+            label="Nivel", category=category, question_type=QuestionType.MULTIPLE_CHOICE
+        )
+        ReportItemOption.objects.create(question=cls.choice, value="Vacío", triggers_alert=True)
+
+        for day in range(1, 11):
+            for unit in cls.units:
+                report = Report.objects.create(unit=unit, author=cls.user, date=date(2025, 3, day))
+                ReportEntry.objects.create(report=report, question=cls.good_bad, answer="Malo" if day == 1 else "Bueno")
+                if day % 2:
+                    ReportEntry.objects.create(report=report, question=cls.choice, answer="Vacío", comment="bajo")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("major_equipment:export_reports"), params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_long_format(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.export(start="2025-03-01", end="2025-03-31", layout="long", unit=self.units[0].pk)
+
+        self.assertEqual(rows[0][-5:], ["Categoría", "Pregunta", "Respuesta", "Comentario", "Alerta"])
+        self.assertEqual(len(rows), 1 + 10 + 5)
+        self.assertEqual(rows[1][4:], ["General", "Luces", "Malo", "", "Sí"])
+        self.assertEqual(rows[2][4:], ["General", "Nivel", "Vacío", "bajo", "Sí"])
+        self.assertEqual(rows[3][-1], "No")
+        # Sesión, preguntas, reglas compiladas (3) y entradas: sin consultas por fila
+        self.assertLess(len(queries), 12)
+
+    def test_wide_format(self):
+        rows = self.export(year=2025, layout="wide")
+
+        self.assertEqual(rows[0], ["Fecha", "Compañía", "Unidad", "Autor", "General / Luces", "General / Nivel", "Alertas"])
+        self.assertEqual(len(rows), 1 + 20)
+        self.assertEqual(rows[1], ["2025-03-01", "Primera Compañía", "1", "admin", "Malo", "Vacío", "2"])
+        self.assertEqual(rows[3][4:], ["Bueno", "", "0"])
+
+    def test_invalid_period(self):
+        response = self.client.get(
+            reverse("major_equipment:export_reports"), {"start": "2025-03-01", "end": "2024-03-01"}, secure=True
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class UnitImageRenditionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        entity = Entity.objects.create(name="Primera Compañía", type=EntityType.COMPANY)
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.unit = create_unit(entity, 1)
+
+    def setUp(self):
+        from PIL import Image
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        original = io.BytesIO()
+        Image.new("RGB", (2000, 1500), "red").save(original, "JPEG")
+        self.image = UnitImage.objects.create(
+            unit=self.unit, image=SimpleUploadedFile("foto.jpg", original.getvalue()),
+        )
+        self.client.force_login(self.user)
+
+    def get_image(self, accept="image/webp,image/*", **params):
+        url = reverse("major_equipment:unit_image", args=[self.image.pk])
+        return self.client.get(url, params, HTTP_ACCEPT=accept, secure=True)
+
+    def read_image(self, response):
+        from PIL import Image
+        return Image.open(io.BytesIO(b"".join(response.streaming_content)))
+
+    def test_card_rendition_is_generated_once_as_webp(self):
+        response = self.get_image(size="card")
+
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("Accept", response["Vary"])
+        image = self.read_image(response)
+        self.assertEqual((image.format, image.size), ("WEBP", (480, 360)))
+
+        storage = self.image.image.storage
+        name = "unit_images/foto.jpg.card.webp"
+        self.assertTrue(storage.exists(name))
+        modified = storage.get_modified_time(name)
+
+        with mock.patch("major_equipment.utils.image_renditions.render_rendition") as render:
+            self.get_image(size="card")
+        render.assert_not_called()
+        self.assertEqual(storage.get_modified_time(name), modified)
+
+    def test_jpeg_fallback_and_original(self):
+        response = self.get_image(accept="image/jpeg", size="carousel")
+        image = self.read_image(response)
+        self.assertEqual((image.format, image.size), ("JPEG", (1280, 960)))
+
+        response = self.get_image(size="huge")
+        self.assertEqual(self.read_image(response).size, (2000, 1500))
+
+    def test_upload_enqueues_rendition_job(self):
+        from main.jobs import load_jobs, run_pending_jobs
+        from main.models import Job
+
+        load_jobs()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = UnitImage.objects.create(unit=self.unit, image=self.image.image.name)
+        self.assertEqual(Job.objects.get().payload, {"image_id": image.pk})
+
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertTrue(image.image.storage.exists("unit_images/foto.jpg.carousel.jpg"))
+
+    def test_renditions_removed_with_image(self):
+        self.get_image(size="card")
+        storage = self.image.image.storage
+
+        self.image.delete()
+
+        self.assertFalse(storage.exists("unit_images/foto.jpg.card.webp"))
+
+    def test_same_stem_with_other_extension_has_own_renditions(self):
+        from PIL import Image
+
+        original = io.BytesIO()
+        Image.new("RGB", (800, 600), "blue").save(original, "PNG")
+        other = UnitImage.objects.create(unit=self.unit, image=SimpleUploadedFile("foto.png", original.getvalue()))
+        self.get_image(size="card")
+
+        url = reverse("major_equipment:unit_image", args=[other.pk])
+        response = self.client.get(url, {"size": "card"}, HTTP_ACCEPT="image/webp", secure=True)
+        image = self.read_image(response)
+        red, _, blue = image.convert("RGB").getpixel((0, 0))
+        self.assertEqual(image.size, (480, 360))
+        self.assertTrue(blue > 200 and red < 50)
+
+        other.delete()
+        self.assertTrue(self.image.image.storage.exists("unit_images/foto.jpg.card.webp"))
+
+    def test_decompression_bomb_falls_back_to_original(self):
+        from PIL import Image
+
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            response = self.get_image(size="card")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read_image(response).size, (2000, 1500))
+
+
+class OfflineUrlFetcherTests(TestCase):
+
+    def test_cdn_bootstrap_resolves_to_vendored_copy(self):
+        result = offline_url_fetcher(
+            "https://cdn.jsdelivr.net/npm/bootstrap@5.3.7/dist/css/bootstrap.min.css"
+        )
+        self.assertEqual(result["mime_type"], "text/css")
+        self.assertIn(b"Bootstrap", result["string"][:200])
+
+    def test_static_url_resolves_to_local_file(self):
+        result = offline_url_fetcher("http://testserver/static/img/logo.png")
+        self.assertEqual(result["mime_type"], "image/png")
+
+    def test_remote_urls_are_refused(self):
+        with self.assertRaises(ValueError):
+            offline_url_fetcher("https://example.com/style.css")
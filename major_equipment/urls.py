@@ -7,6 +7,7 @@ urlpatterns = [
     # UNIDADES
     path("units/", view_get_units, name="units"),
     path("units/<int:unit_id>/", view_get_unit, name="unit"),
+    path("units/expirations/", view_expiration_dashboard, name="expiration_dashboard"),
     
     # Imagenes de las unidades
     path('unit-image/<int:image_id>/', protected_unit_image, name='unit_image'),
@@ -14,13 +15,21 @@ urlpatterns = [
     # REPORTES
     path("reports/create/", view_create_report, name="create_report"),
     path("reports/", view_unit_reports, name="unit_reports"),
+    path("reports/year/", view_unit_reports_year, name="unit_reports_year"),
     path("reports/<int:report_id>/", view_get_report, name="get_report"),
+    path("reports/export/", view_export_reports, name="export_reports"),
+    path("reports/compliance/", view_compliance_matrix, name="compliance_matrix"),
+    path("reports/compliance/JSON/", view_compliance_matrix_json, name="compliance_matrix_json"),
 
     path("<int:unit_id>/reports/<int:report_id>/PDF/", view_generate_report_pdf, name="get_report_pdf"),
+    path("<int:unit_id>/reports/PDF/", view_generate_unit_reports_pdf, name="get_unit_reports_pdf"),
 
     # COMBUSTIBLE
+    path("fuel/export/", view_export_fuel_logs, name="export_fuel_logs"),
+    path("fuel/summary/JSON/", view_fleet_fuel_summary_json, name="fleet_fuel_summary_json"),
     path("<int:unit_id>/fuel/create/", view_create_fuel, name="create_fuel"),
     path("<int:unit_id>/fuel/", view_unit_fuel, name="unit_fuel"),
+    path("<int:unit_id>/fuel/efficiency/JSON/", view_unit_fuel_efficiency_json, name="unit_fuel_efficiency_json"),
     path("<int:unit_id>/fuel/<int:fuel_log_id>/", view_get_fuel_log, name="get_fuel_log"),
 
     # Mantenciones
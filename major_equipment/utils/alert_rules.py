@@ -0,0 +1,135 @@
+from django.core.cache import cache
+from django.db import transaction
+from major_equipment.models.report import (
+    NumericAlertRule, QuestionType, ReportItemOption, ReportTemplateItem, numeric_rule_triggered,
+)
+
+# Clave en caché de la tabla compilada de cada pregunta.
+ALERT_RULES_KEY = "major_equipment:alert_rules:{question_id}"
+ALERT_RULES_TIMEOUT = 60 * 60 * 24  # 1 día; las señales la invalidan al cambiar
+
+
+class CompiledAlertRule:
+    """
+    Reglas de alerta de una pregunta (ReportTemplateItem) ya cargadas en memoria.
+
+    Atributos:
+        question_type (int): Tipo de pregunta.
+        alert_values (frozenset[str]): Opciones que activan alerta (opción múltiple).
+        intervals (tuple[tuple]): Pares (min_value, max_value) de las reglas numéricas.
+    """
+
+    def __init__(self, question_type, alert_values=(), intervals=()):
+        self.question_type = question_type
+        self.alert_values = frozenset(alert_values)
+        self.intervals = tuple(intervals)
+
+    def triggers(self, answer) -> bool:
+        """Evalúa la respuesta sin consultar la base de datos."""
+        val = (answer or "").strip()
+
+        if self.question_type == QuestionType.GOOD_BAD:
+            # Alerta en "Malo"
+            return val == "Malo"
+
+        elif self.question_type == QuestionType.MULTIPLE_CHOICE:
+            return val in self.alert_values
+
+        elif self.question_type == QuestionType.NUMERIC:
+            return any(
+                numeric_rule_triggered(min_value, max_value, val)
+                for min_value, max_value in self.intervals
+            )
+
+        return False
+
+    def to_cache(self) -> tuple:
+        return (self.question_type, self.alert_values, self.intervals)
+
+    @classmethod
+    def from_cache(cls, value: tuple) -> "CompiledAlertRule":
+        return cls(*value)
+
+
+def compile_alert_rules(question_ids) -> dict:
+    """
+    Compila las reglas de las preguntas indicadas con tres consultas, sin importar
+    cuántas sean. Retorna {question_id: CompiledAlertRule}.
+    """
+    question_ids = set(question_ids)
+    question_types = dict(
+        ReportTemplateItem.objects.filter(pk__in=question_ids).values_list("pk", "question_type")
+    )
+
+    alert_values = {}
+    for question_id, value in (
+        ReportItemOption.objects
+        .filter(question_id__in=question_ids, triggers_alert=True)
+        .values_list("question_id", "value")
+    ):
+        alert_values.setdefault(question_id, set()).add(value)
+
+    intervals = {}
+    for question_id, min_value, max_value in (
+        NumericAlertRule.objects
+        .filter(question_id__in=question_ids)
+        .order_by("pk")
+        .values_list("question_id", "min_value", "max_value")
+    ):
+        intervals.setdefault(question_id, []).append((min_value, max_value))
+
+    return {
+        question_id: CompiledAlertRule(
+            question_type,
+            alert_values.get(question_id, ()),
+            intervals.get(question_id, ()),
+        )
+        for question_id, question_type in question_types.items()
+    }
+
+
+def get_alert_rules(question_ids) -> dict:
+    """
+    Retorna {question_id: CompiledAlertRule} desde el caché, compilando solo las
+    preguntas que falten. Las preguntas inexistentes no generan alertas.
+    """
+    question_ids = set(question_ids)
+    keys = {ALERT_RULES_KEY.format(question_id=question_id): question_id for question_id in question_ids}
+
+    rules = {
+        keys[key]: CompiledAlertRule.from_cache(value)
+        for key, value in cache.get_many(keys).items()
+    }
+
+    missing = question_ids - rules.keys()
+    if missing:
+        compiled = compile_alert_rules(missing)
+        cache.set_many(
+            {ALERT_RULES_KEY.format(question_id=question_id): rule.to_cache() for question_id, rule in compiled.items()},
+            ALERT_RULES_TIMEOUT,
+        )
+        rules.update(compiled)
+        for question_id in missing - compiled.keys():
+            rules[question_id] = CompiledAlertRule(None)
+
+    return rules
+
+
+def invalidate_alert_rules(question_id: int) -> None:
+    """
+    Descarta la tabla compilada de una pregunta, de inmediato y nuevamente al
+    confirmar la transacción (por si otro proceso la recompiló entretanto).
+    """
+    key = ALERT_RULES_KEY.format(question_id=question_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def evaluate_entries_alerts(entries) -> dict:
+    """
+    Evalúa en memoria las alertas de un conjunto de entradas (p. ej. las de un reporte).
+    Solo usa question_id y answer de cada entrada. Retorna {entry.pk: bool}.
+    """
+    entries = list(entries)
+    rules = get_alert_rules(entry.question_id for entry in entries)
+    return {entry.pk: rules[entry.question_id].triggers(entry.answer) for entry in entries}
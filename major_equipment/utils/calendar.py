@@ -1,8 +1,21 @@
 import calendar
 from datetime import date
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from major_equipment.models.report import Report
 
+# Clave en caché de los días con reporte de una unidad en un mes ya cerrado.
+YEAR_CALENDAR_KEY = "major_equipment:calendar:{unit_id}:{year}-{month:02d}"
+YEAR_CALENDAR_TIMEOUT = 60 * 60 * 24 * 365  # las señales la invalidan si se edita un reporte antiguo
+
+def get_month_range(year, month):
+    """
+    Retorna el primer y último día del mes indicado.
+    """
+    _, num_days = calendar.monthrange(year, month)
+    return date(year, month, 1), date(year, month, num_days)
+
 def get_calendar_data(unit, year, month):
     today = timezone.localdate()
 
@@ -54,3 +67,100 @@ def get_calendar_data(unit, year, month):
         cells.append({"day": "", "css_class": "empty-day", "disabled": True})
 
     return cells
+
+
+def get_year_report_days(unit, year, today):
+    """
+    Días con reporte de la unidad en cada mes del año, como mapa de bits por mes
+    (bit d-1 encendido si hay reporte el día d): {month: int}.
+
+    Los meses ya cerrados (anteriores al mes de `today`) se leen del caché; el resto
+    se obtiene con una sola consulta values_list('date') sobre el rango que falte.
+    """
+    closed_keys = {
+        YEAR_CALENDAR_KEY.format(unit_id=unit.pk, year=year, month=month): month
+        for month in range(1, 13)
+        if get_month_range(year, month)[1] < today.replace(day=1)
+    }
+    report_days = {
+        closed_keys[key]: bits for key, bits in cache.get_many(closed_keys).items()
+    }
+
+    missing = [month for month in range(1, 13) if month not in report_days]
+    if missing:
+        start = date(year, missing[0], 1)
+        end = get_month_range(year, missing[-1])[1]
+        for month in missing:
+            report_days[month] = 0
+        for report_date in (
+            Report.objects
+            .filter(unit=unit, date__range=(start, end), deleted=False)
+            .values_list("date", flat=True)
+        ):
+            if report_date.month in report_days:
+                report_days[report_date.month] |= 1 << (report_date.day - 1)
+
+        cache.set_many(
+            {key: report_days[month] for key, month in closed_keys.items() if month in missing},
+            YEAR_CALENDAR_TIMEOUT,
+        )
+
+    return report_days
+
+
+def invalidate_year_calendar(unit_id, report_date):
+    """
+    Descarta el mes en caché de la unidad para la fecha indicada, de inmediato y
+    nuevamente al confirmar la transacción.
+    """
+    key = YEAR_CALENDAR_KEY.format(unit_id=unit_id, year=report_date.year, month=report_date.month)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_year_calendar_data(unit, year):
+    """
+    Calendario anual de la unidad, con una grilla por mes al estilo de get_calendar_data.
+
+    Retorna una lista de 12 meses:
+        [{"month": int, "cells": [...], "done": int, "expected": int,
+          "percentage": float | None}, ...]
+    """
+    today = timezone.localdate()
+    report_days = get_year_report_days(unit, year, today)
+
+    months = []
+    for month in range(1, 13):
+        bits = report_days[month]
+        first_weekday, num_days = calendar.monthrange(year, month)
+        cells = [{"day": "", "css_class": "empty-day"} for _ in range(first_weekday)]
+        expected = 0
+
+        for day in range(1, num_days + 1):
+            current_date = date(year, month, day)
+            css_class = "day"
+            if current_date == today:
+                css_class += " today"
+
+            if bits >> (day - 1) & 1:
+                css_class += " done"
+                expected += 1
+            elif current_date < today:
+                css_class += " missing"
+                expected += 1
+
+            cells.append({"day": day, "css_class": css_class})
+
+        while len(cells) % 7 != 0:
+            cells.append({"day": "", "css_class": "empty-day"})
+
+        done = bin(bits).count("1")
+        months.append({
+            "month": month,
+            "cells": cells,
+            "done": done,
+            "expected": expected,
+            "percentage": round(100 * done / expected, 1) if expected else None,
+        })
+
+    return months
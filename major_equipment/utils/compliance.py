@@ -0,0 +1,98 @@
+from datetime import date
+from django.core.cache import cache
+from django.db import transaction
+from major_equipment.models.report import Report
+from major_equipment.utils.calendar import get_month_range
+
+# Estados de cada celda unidad × día.
+STATE_DONE = "done"
+STATE_MISSING = "missing"
+STATE_FUTURE = "future"
+
+# Clave en caché de los días con reporte de cada mes (para toda la flota).
+COMPLIANCE_KEY = "major_equipment:compliance:{year}-{month:02d}"
+COMPLIANCE_TIMEOUT = 60 * 60 * 24 * 31  # las señales la invalidan al guardar un Report
+
+
+def get_month_report_days(year: int, month: int) -> dict:
+    """
+    Días con reporte de cada unidad en el mes, como mapa de bits por unidad
+    (bit d-1 encendido si hay reporte el día d): {unit_id: int}.
+
+    Se calcula para toda la flota con una sola consulta de pares (unidad, fecha)
+    y queda en caché hasta que se guarde o elimine un Report de ese mes.
+    """
+    key = COMPLIANCE_KEY.format(year=year, month=month)
+    report_days = cache.get(key)
+    if report_days is None:
+        start, end = get_month_range(year, month)
+        report_days = {}
+        for unit_id, report_date in (
+            Report.objects
+            .filter(date__range=(start, end), deleted=False)
+            .values_list("unit_id", "date")
+        ):
+            report_days[unit_id] = report_days.get(unit_id, 0) | (1 << (report_date.day - 1))
+        cache.set(key, report_days, COMPLIANCE_TIMEOUT)
+    return report_days
+
+
+def invalidate_compliance(report_date: date) -> None:
+    """
+    Descarta la matriz en caché del mes de la fecha indicada, de inmediato y
+    nuevamente al confirmar la transacción.
+    """
+    key = COMPLIANCE_KEY.format(year=report_date.year, month=report_date.month)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_compliance_matrix(units, year: int, month: int, today: date) -> dict:
+    """
+    Matriz de cumplimiento de checklist unidad × día del mes para las unidades indicadas.
+
+    Cada celda es "done" (con reporte), "missing" (día pasado sin reporte) o
+    "future" (hoy sin reporte o días posteriores). El porcentaje de cumplimiento
+    considera los días ya transcurridos, más hoy si ya tiene reporte.
+
+    Retorna:
+        {
+            "days": [1, 2, ...],
+            "rows": [{"unit": Unit, "cells": [estado, ...], "done": int,
+                      "expected": int, "percentage": float | None}, ...],
+        }
+    """
+    start, end = get_month_range(year, month)
+    days = list(range(1, end.day + 1))
+    report_days = get_month_report_days(year, month)
+
+    if today < start:
+        elapsed = 0
+    elif today > end:
+        elapsed = end.day
+    else:
+        elapsed = today.day - 1  # días anteriores a hoy
+
+    rows = []
+    for unit in units:
+        bits = report_days.get(unit.pk, 0)
+        cells = []
+        for day in days:
+            if bits >> (day - 1) & 1:
+                cells.append(STATE_DONE)
+            elif day <= elapsed:
+                cells.append(STATE_MISSING)
+            else:
+                cells.append(STATE_FUTURE)
+
+        done = bin(bits).count("1")
+        expected = elapsed + sum(1 for day in days[elapsed:] if bits >> (day - 1) & 1)
+        rows.append({
+            "unit": unit,
+            "cells": cells,
+            "done": done,
+            "expected": expected,
+            "percentage": round(100 * done / expected, 1) if expected else None,
+        })
+
+    return {"days": days, "rows": rows}
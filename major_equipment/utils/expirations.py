@@ -0,0 +1,191 @@
+from datetime import date, timedelta
+from django.db.models import Case, CharField, DateField, DurationField, ExpressionWrapper, F, Q, Value, When
+from docs.models import FileVencible
+from firebrigade.utils import get_user_entity_ids_with_permission
+
+# Días de anticipación con los que se avisa un documento por vencer.
+NOTICE_DAYS = [30, 20] + list(range(14, -1, -1))
+
+# Estado de cada documento en el aviso.
+BUCKET_EXPIRED = "expired"
+BUCKET_UPCOMING = "upcoming"
+
+# Tramos del panel de vencimientos: (clave, etiqueta, días restantes máximos).
+# El primero agrupa los vencidos y el último no tiene límite.
+DASHBOARD_BUCKETS = (
+    (BUCKET_EXPIRED, "Vencidos", -1),
+    ("week", "Vencen en 7 días o menos", 7),
+    ("month", "Vencen en 30 días o menos", 30),
+    ("quarter", "Vencen en 90 días o menos", 90),
+    ("later", "Vencen en más de 90 días", None),
+)
+
+# Documentos con vencimiento de la unidad: (relación inversa desde FileVencible, etiqueta).
+UNIT_DOCUMENTS = (
+    ("unit_soap", "SOAP"),
+    ("unit_technical_inspection", "Revisión técnica"),
+    ("unit_vehicle_permit", "Permiso de circulación"),
+)
+
+
+def get_notice_dates(today: date) -> list:
+    """Fechas de vencimiento que generan aviso hoy (según NOTICE_DAYS)."""
+    return [today + timedelta(days=days) for days in NOTICE_DAYS]
+
+
+def scan_expiring_documents(today: date) -> list:
+    """
+    Documentos vencidos o por vencer (en alguna fecha de aviso), con una sola consulta.
+
+    La base clasifica cada FileVencible en "expired" o "upcoming" y resuelve, por las
+    relaciones inversas de Unit (soap, technical_inspection, vehicle_permit), las
+    unidades y entidades dueñas del documento. Un documento compartido por varias
+    unidades produce varias filas, que se agrupan aquí.
+
+    Retorna, ordenados por fecha de vencimiento:
+        [{"id": int, "short_name": str, "expiration_date": date, "bucket": str,
+          "units": [(etiqueta, unit_number), ...], "entity_ids": set[int]}, ...]
+    """
+    columns = ["pk", "short_name", "expiration_date", "bucket"]
+    for relation, _ in UNIT_DOCUMENTS:
+        columns += [f"{relation}__unit_number", f"{relation}__entity_id"]
+
+    rows = (
+        FileVencible.objects
+        .filter(Q(expiration_date__lt=today) | Q(expiration_date__in=get_notice_dates(today)))
+        .annotate(bucket=Case(
+            When(expiration_date__lt=today, then=Value(BUCKET_EXPIRED)),
+            default=Value(BUCKET_UPCOMING),
+            output_field=CharField(),
+        ))
+        .order_by("expiration_date", "pk")
+        .values_list(*columns)
+    )
+
+    documents = {}
+    for pk, short_name, expiration_date, bucket, *owners in rows:
+        document = documents.setdefault(pk, {
+            "id": pk,
+            "short_name": short_name,
+            "expiration_date": expiration_date,
+            "bucket": bucket,
+            "units": [],
+            "entity_ids": set(),
+        })
+        for (_, label), unit_number, entity_id in zip(UNIT_DOCUMENTS, owners[::2], owners[1::2]):
+            if unit_number is not None and (label, unit_number) not in document["units"]:
+                document["units"].append((label, unit_number))
+                document["entity_ids"].add(entity_id)
+    return list(documents.values())
+
+
+def index_documents_by_entity(documents) -> dict:
+    """
+    Agrupa los documentos por entidad dueña: {entity_id: {document_id, ...}}.
+    Los documentos sin unidad quedan bajo la clave None.
+    """
+    by_entity = {}
+    for document in documents:
+        for entity_id in document["entity_ids"] or (None,):
+            by_entity.setdefault(entity_id, set()).add(document["id"])
+    return by_entity
+
+
+def get_visible_entity_ids(user):
+    """
+    Entidades cuyos documentos ve el usuario, con el mismo criterio que
+    get_units_for_user: None si ve todas, o el conjunto de ids por cargo.
+    """
+    if user.is_superuser or user.has_perm('major_equipment.view_unit'):
+        return None
+    return get_user_entity_ids_with_permission(user, 'view_company_majorequipment')
+
+
+def get_user_documents(documents, by_entity: dict, entity_ids) -> list:
+    """
+    Documentos del resumen de un usuario a partir del índice por entidad.
+    Con entity_ids None (acceso a toda la flota) incluye también los documentos sin unidad.
+    """
+    if entity_ids is None:
+        return list(documents)
+    visible = set()
+    for entity_id in entity_ids:
+        visible |= by_entity.get(entity_id, set())
+    return [document for document in documents if document["id"] in visible]
+
+
+def annotate_expiration(queryset, today: date):
+    """
+    Anota sobre un QuerySet de FileVencible, calculado en la base de datos:
+    - days_remaining: expiration_date - today (timedelta; negativo si ya venció).
+    - expiration_bucket: clave del tramo de DASHBOARD_BUCKETS.
+    """
+    whens = [
+        When(expiration_date__lte=today + timedelta(days=limit), then=Value(key))
+        for key, _, limit in DASHBOARD_BUCKETS
+        if limit is not None
+    ]
+    return queryset.annotate(
+        days_remaining=ExpressionWrapper(
+            F("expiration_date") - Value(today, output_field=DateField()),
+            output_field=DurationField(),
+        ),
+        expiration_bucket=Case(*whens, default=Value(DASHBOARD_BUCKETS[-1][0]), output_field=CharField()),
+    )
+
+
+def get_expiration_dashboard(today: date, entity_ids=None) -> list:
+    """
+    SOAP, revisiones técnicas y permisos de circulación de la flota agrupados por
+    días restantes, con una sola consulta ordenada por el índice de expiration_date.
+
+    `entity_ids` limita el panel a las unidades de esas entidades (None: toda la flota).
+    Un documento compartido entre unidades aparece una vez, con todas sus unidades visibles.
+
+    Retorna, en el orden de DASHBOARD_BUCKETS:
+        [{"key": str, "label": str,
+          "documents": [{"id": int, "short_name": str, "expiration_date": date,
+                         "days_remaining": int, "units": [(etiqueta, unit_id, unit_number), ...]}, ...]},
+         ...]
+    """
+    owned = Q()
+    for relation, _ in UNIT_DOCUMENTS:
+        if entity_ids is None:
+            owned |= Q(**{f"{relation}__isnull": False})
+        else:
+            owned |= Q(**{f"{relation}__entity_id__in": entity_ids})
+
+    columns = ["pk", "short_name", "expiration_date", "days_remaining", "expiration_bucket"]
+    for relation, _ in UNIT_DOCUMENTS:
+        columns += [f"{relation}__pk", f"{relation}__unit_number", f"{relation}__entity_id"]
+
+    rows = (
+        annotate_expiration(FileVencible.objects.filter(owned), today)
+        .order_by("expiration_date", "pk")
+        .values_list(*columns)
+    )
+
+    documents = {}
+    buckets = {key: [] for key, _, _ in DASHBOARD_BUCKETS}
+    for pk, short_name, expiration_date, days_remaining, bucket, *owners in rows:
+        document = documents.get(pk)
+        if document is None:
+            document = documents[pk] = {
+                "id": pk,
+                "short_name": short_name,
+                "expiration_date": expiration_date,
+                "days_remaining": days_remaining.days,
+                "units": [],
+            }
+            buckets[bucket].append(document)
+        for index, (_, label) in enumerate(UNIT_DOCUMENTS):
+            unit_id, unit_number, entity_id = owners[3 * index:3 * index + 3]
+            if unit_id is None or (entity_ids is not None and entity_id not in entity_ids):
+                continue
+            if (label, unit_id, unit_number) not in document["units"]:
+                document["units"].append((label, unit_id, unit_number))
+
+    return [
+        {"key": key, "label": label, "documents": buckets[key]}
+        for key, label, _ in DASHBOARD_BUCKETS
+    ]
@@ -0,0 +1,161 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# Formatos de exportación admitidos y su tipo MIME.
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Filas por consulta al recorrer el queryset con iterator().
+EXPORT_CHUNK_SIZE = 2000
+
+# Caracteres fuera del rango Char de XML 1.0 (p. ej. \x0b): Excel rechaza el libro si aparecen.
+XML_ILLEGAL_CHARS = re.compile("[^\x09\x0a\x0d\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def xml_text(value: str) -> str:
+    """Texto apto para XML: sin caracteres no permitidos y con &, < y > escapados."""
+    return escape(XML_ILLEGAL_CHARS.sub("", value))
+
+
+class Echo:
+    """Objeto tipo archivo que retorna lo escrito en vez de guardarlo (para csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def format_cell(value):
+    """Convierte un valor a texto para la exportación (fechas en hora local)."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_csv(header, rows):
+    """Genera el CSV línea a línea (con BOM para que Excel reconozca UTF-8)."""
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([format_cell(value) for value in row])
+
+
+class ZipChunks:
+    """
+    Destino no posicionable para zipfile: acumula lo escrito hasta que se retira con
+    pop(), de modo que el XLSX se emite por partes mientras se genera.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def xlsx_row(values) -> str:
+    """Fila de la hoja: números como celdas numéricas y el resto como texto en línea."""
+    cells = []
+    for value in values:
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = xml_text(format_cell(value))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+def stream_xlsx(header, rows, sheet_name="Hoja1"):
+    """
+    Genera un XLSX mínimo (una hoja, sin estilos) con zipfile, emitiendo los bytes
+    comprimidos a medida que se escriben las filas, sin armar el archivo en memoria.
+    """
+    output = ZipChunks()
+    with zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_DEFLATED) as xlsx:
+        xlsx.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        xlsx.writestr("_rels/.rels", XLSX_RELS)
+        xlsx.writestr("xl/workbook.xml", XLSX_WORKBOOK.format(name=escape(XML_ILLEGAL_CHARS.sub("", sheet_name)[:31], {'"': "&quot;"})))
+        xlsx.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        yield output.pop()
+
+        with xlsx.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as sheet:
+            sheet.write((XLSX_SHEET_START + xlsx_row(header)).encode())
+            for row in rows:
+                sheet.write(xlsx_row(row).encode())
+                if output.chunks:
+                    yield output.pop()
+            sheet.write(XLSX_SHEET_END.encode())
+    yield output.pop()
+
+
+def streaming_export_response(export_format: str, filename: str, header, rows, sheet_name="Hoja1"):
+    """
+    StreamingHttpResponse con las filas en CSV o XLSX. `rows` debe ser un iterable
+    perezoso (p. ej. queryset.iterator()) para que la memoria no crezca con el total.
+    """
+    if export_format == "xlsx":
+        content = stream_xlsx(header, rows, sheet_name)
+    else:
+        content = stream_csv(header, rows)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,130 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Avg, Count, Sum
+from django.utils import timezone
+from major_equipment.models.fuel_log import FuelLog
+from major_equipment.utils.calendar import get_month_range
+
+
+def get_month_datetime_range(year: int, month: int) -> tuple:
+    """
+    Inicio del mes y del mes siguiente como datetimes con zona horaria local.
+
+    Filtrar con date__gte/date__lt sobre estos límites permite usar el índice
+    (unit, date), a diferencia de date__year/date__month, que envuelven la
+    columna en funciones.
+    """
+    start, end = get_month_range(year, month)
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def get_unit_month_fuel_logs(unit, year: int, month: int):
+    """Cargas de combustible (no eliminadas) de la unidad en el mes."""
+    start, end = get_month_datetime_range(year, month)
+    return FuelLog.objects.filter(unit=unit, date__gte=start, date__lt=end, deleted=False)
+
+
+def get_fuel_totals(fuel_logs) -> dict:
+    """
+    Totales y promedios de un conjunto de cargas, calculados en la base de datos.
+
+    Retorna {"count", "quantity", "cost", "avg_quantity", "avg_cost", "price_per_liter"};
+    los montos son 0 y los promedios None si no hay cargas.
+    """
+    aggregates = fuel_logs.aggregate(
+        total_count=Count("id"),
+        total_quantity=Sum("quantity"),
+        total_cost=Sum("cost"),
+        avg_quantity=Avg("quantity"),
+        avg_cost=Avg("cost"),
+    )
+    totals = {
+        "count": aggregates["total_count"],
+        "quantity": aggregates["total_quantity"] or 0,
+        "cost": aggregates["total_cost"] or 0,
+        "avg_quantity": aggregates["avg_quantity"],
+        "avg_cost": aggregates["avg_cost"],
+    }
+    totals["price_per_liter"] = round(totals["cost"] / totals["quantity"]) if totals["quantity"] else None
+    return totals
+
+
+def get_fuel_station_breakdown(fuel_logs) -> list:
+    """
+    Cargas (count), litros (total_quantity) y costo (total_cost) por estación de
+    servicio, de mayor a menor costo.
+    """
+    return list(
+        fuel_logs
+        .values("station_id", "station__label")
+        .annotate(count=Count("id"), total_quantity=Sum("quantity"), total_cost=Sum("cost"))
+        .order_by("-total_cost", "station__label")
+    )
+
+
+def get_fuel_month_summary(unit, year: int, month: int) -> dict:
+    """
+    Resumen de combustible de la unidad en el mes, comparado con el mes anterior.
+
+    Retorna:
+        {
+            "totals": get_fuel_totals(...),
+            "stations": get_fuel_station_breakdown(...),
+            "previous": get_fuel_totals(...) del mes anterior,
+            "quantity_change": float | None,  # variación porcentual
+            "cost_change": float | None,
+        }
+    """
+    prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    fuel_logs = get_unit_month_fuel_logs(unit, year, month)
+    totals = get_fuel_totals(fuel_logs)
+    previous = get_fuel_totals(get_unit_month_fuel_logs(unit, prev_year, prev_month))
+
+    def change(current, before):
+        return round(100 * (current - before) / before, 1) if before else None
+
+    return {
+        "totals": totals,
+        "stations": get_fuel_station_breakdown(fuel_logs),
+        "previous": previous,
+        "quantity_change": change(totals["quantity"], previous["quantity"]),
+        "cost_change": change(totals["cost"], previous["cost"]),
+    }
+
+
+def get_year_datetime_range(year: int) -> tuple:
+    """Inicio del año y del año siguiente como datetimes con zona horaria local."""
+    return get_month_datetime_range(year, 1)[0], get_month_datetime_range(year, 12)[1]
+
+
+# Columnas de la exportación de cargas de combustible.
+FUEL_EXPORT_HEADER = [
+    "Fecha", "Compañía", "Unidad", "Patente", "Estación", "N° guía",
+    "Cantidad (L)", "Costo (CLP)", "Kilometraje", "Autor", "Observaciones",
+]
+
+
+def get_fuel_export_rows(fuel_logs, chunk_size: int):
+    """
+    Filas de la exportación, recorriendo las cargas por bloques de `chunk_size`
+    con sus relaciones en la misma consulta.
+    """
+    fuel_logs = fuel_logs.select_related("station", "unit__entity", "author").order_by("date", "id")
+    for log in fuel_logs.iterator(chunk_size=chunk_size):
+        yield [
+            log.date,
+            log.unit.entity.name,
+            log.unit.unit_number,
+            log.unit.plate_number,
+            log.station.label,
+            log.guide_number,
+            log.quantity,
+            log.cost,
+            log.cargo_mileage,
+            log.author.get_full_name() or log.author.username,
+            log.notes,
+        ]
@@ -0,0 +1,151 @@
+import statistics
+from django.db import transaction
+from django.db.models import F, Max, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+from major_equipment.models.fuel_log import FuelAnomaly, FuelAnomalyKind, FuelAnomalyRun, FuelLog
+
+# Mínimo de rendimientos válidos de una unidad para evaluar atípicos.
+OUTLIER_MIN_SAMPLES = 8
+# Factor del rango intercuartílico (criterio de Tukey).
+OUTLIER_IQR_FACTOR = 1.5
+
+
+def get_unit_fuel_history(unit_ids) -> list:
+    """
+    Historial (no eliminado) de las unidades con el kilometraje de la carga anterior,
+    en una sola consulta con LAG particionado por unidad.
+    """
+    return list(
+        FuelLog.objects
+        .filter(unit_id__in=unit_ids, deleted=False)
+        .annotate(previous_mileage=Window(
+            Lag("cargo_mileage"),
+            partition_by=[F("unit_id")],
+            order_by=[F("date").asc(), F("id").asc()],
+        ))
+        .order_by("unit_id", "date", "id")
+        .values(
+            "id", "unit_id", "date", "quantity", "cost",
+            "cargo_mileage", "previous_mileage", "unit__fuel_tank_capacity",
+        )
+    )
+
+
+def get_efficiency_bounds(values) -> tuple:
+    """
+    Límites (inferior, superior) de rendimiento aceptable según el criterio de Tukey,
+    o None si no hay suficientes muestras.
+    """
+    if len(values) < OUTLIER_MIN_SAMPLES:
+        return None
+    q1, _, q3 = statistics.quantiles(values, n=4)
+    margin = OUTLIER_IQR_FACTOR * (q3 - q1)
+    return q1 - margin, q3 + margin
+
+
+def detect_fuel_anomalies(since_id: int = 0) -> list:
+    """
+    Analiza las cargas con id mayor a `since_id` y retorna las FuelAnomaly (sin guardar):
+
+    - OVER_CAPACITY: la cantidad supera Unit.fuel_tank_capacity.
+    - ODOMETER_REGRESSION: el kilometraje es menor al de la carga anterior de la unidad.
+    - EFFICIENCY_OUTLIER: km/L fuera de [Q1 - 1.5·IQR, Q3 + 1.5·IQR] del historial de la unidad.
+    - DUPLICATE: misma unidad, cantidad y costo el mismo día. (El número de guía es
+      correlativo de cada estación, por lo que repetirlo en otra estación es normal;
+      dentro de la misma estación lo impide la restricción única.)
+
+    Solo se carga el historial de las unidades con cargas nuevas (una consulta).
+    """
+    unit_ids = set(
+        FuelLog.objects.filter(pk__gt=since_id, deleted=False).values_list("unit_id", flat=True).distinct()
+    )
+    if not unit_ids:
+        return []
+
+    history = get_unit_fuel_history(unit_ids)
+    new_rows = [row for row in history if row["id"] > since_id]
+    anomalies = []
+
+    def flag(row, kind, detail):
+        anomalies.append(FuelAnomaly(fuel_log_id=row["id"], kind=kind, detail=detail[:300]))
+
+    # Rendimiento (km/L) de cada carga con distancia válida, agrupado por unidad
+    efficiency = {}
+    efficiency_by_unit = {}
+    for row in history:
+        if row["previous_mileage"] is None or not row["quantity"]:
+            continue
+        distance = row["cargo_mileage"] - row["previous_mileage"]
+        if distance > 0:
+            efficiency[row["id"]] = float(distance / row["quantity"])
+            efficiency_by_unit.setdefault(row["unit_id"], []).append(efficiency[row["id"]])
+
+    bounds = {unit_id: get_efficiency_bounds(values) for unit_id, values in efficiency_by_unit.items()}
+
+    # Misma unidad, cantidad y costo el mismo día
+    same_load = {}
+    for row in history:
+        key = (row["unit_id"], row["quantity"], row["cost"], timezone.localdate(row["date"]))
+        same_load.setdefault(key, []).append(row["id"])
+
+    for row in new_rows:
+        capacity = row["unit__fuel_tank_capacity"]
+        if capacity and row["quantity"] > capacity:
+            flag(row, FuelAnomalyKind.OVER_CAPACITY, f"{row['quantity']} L cargados; capacidad {capacity} L.")
+
+        if row["previous_mileage"] is not None and row["cargo_mileage"] < row["previous_mileage"]:
+            flag(row, FuelAnomalyKind.ODOMETER_REGRESSION,
+                 f"{row['cargo_mileage']} km; carga anterior {row['previous_mileage']} km.")
+
+        unit_bounds = bounds.get(row["unit_id"])
+        if unit_bounds and row["id"] in efficiency:
+            low, high = unit_bounds
+            if not low <= efficiency[row["id"]] <= high:
+                flag(row, FuelAnomalyKind.EFFICIENCY_OUTLIER,
+                     f"{efficiency[row['id']]:.2f} km/L; rango esperado {max(low, 0):.2f}–{high:.2f} km/L.")
+
+        others = [
+            log_id
+            for log_id in same_load[(row["unit_id"], row["quantity"], row["cost"], timezone.localdate(row["date"]))]
+            if log_id != row["id"]
+        ]
+        if others:
+            flag(row, FuelAnomalyKind.DUPLICATE, "Coincide con la(s) carga(s) " + ", ".join(f"#{i}" for i in others))
+
+    return anomalies
+
+
+def get_last_processed_fuel_log_id() -> int:
+    """Id de la última carga analizada por el detector (0 si nunca se ha ejecutado)."""
+    return FuelAnomalyRun.objects.order_by("-pk").values_list("last_fuel_log_id", flat=True).first() or 0
+
+
+def run_fuel_anomaly_detection(full: bool = False) -> FuelAnomalyRun:
+    """
+    Ejecuta el detector sobre las cargas nuevas desde la última ejecución (o sobre
+    todo el historial con full=True, reemplazando las anomalías registradas) y guarda
+    las anomalías y la ejecución en una transacción.
+    """
+    with transaction.atomic():
+        since_id = 0 if full else get_last_processed_fuel_log_id()
+        last_id = FuelLog.objects.aggregate(last=Max("id"))["last"] or since_id
+
+        anomalies = [anomaly for anomaly in detect_fuel_anomalies(since_id) if anomaly.fuel_log_id <= last_id]
+        if full:
+            FuelAnomaly.objects.all().delete()
+        else:
+            # Solo se cuentan (e insertan) los pares (carga, tipo) que aún no están registrados
+            existing = set(
+                FuelAnomaly.objects
+                .filter(fuel_log_id__in={anomaly.fuel_log_id for anomaly in anomalies})
+                .values_list("fuel_log_id", "kind")
+            )
+            anomalies = [anomaly for anomaly in anomalies if (anomaly.fuel_log_id, anomaly.kind) not in existing]
+        FuelAnomaly.objects.bulk_create(anomalies, ignore_conflicts=True)
+
+        return FuelAnomalyRun.objects.create(
+            last_fuel_log_id=max(last_id, since_id),
+            processed=FuelLog.objects.filter(pk__gt=since_id, pk__lte=last_id, deleted=False).count(),
+            flagged=len(anomalies),
+        )
@@ -0,0 +1,113 @@
+from django.db.models import F, RowRange, Sum, Window
+from django.db.models.functions import Lag
+from major_equipment.models.fuel_log import FuelLog
+
+# Cantidad de cargas consideradas en los promedios móviles.
+ROLLING_WINDOW = 5
+
+
+def ratio(numerator, denominator, factor=1, digits=2):
+    """Cociente redondeado, o None si falta algún valor o alguno no es positivo."""
+    if numerator is None or numerator <= 0 or denominator is None or denominator <= 0:
+        return None
+    return round(float(numerator) * factor / float(denominator), digits)
+
+
+def get_fuel_efficiency_series(unit, start=None, end=None, window: int = ROLLING_WINDOW) -> list:
+    """
+    Serie de rendimiento de la unidad, una fila por carga (no eliminada) ordenada por fecha.
+
+    La distancia recorrida se mide entre cargas consecutivas (kilometraje actual menos
+    el de la carga anterior) y se atribuye a los litros de la carga actual (método de
+    estanque lleno). Las diferencias y los acumulados móviles se calculan en la base
+    de datos con funciones de ventana (LAG y SUM ... ROWS BETWEEN). Como el WHERE se
+    aplica antes que las ventanas, la consulta incluye además las `window` cargas
+    previas a start, que se descartan al armar la serie.
+
+    Cada fila:
+        {"id", "date", "cargo_mileage", "quantity", "cost",
+         "distance", "km_per_liter", "liters_per_100km", "cost_per_km",
+         "rolling_km_per_liter", "rolling_cost_per_km"}
+
+    Las métricas son None en la primera carga o si el kilometraje no aumentó.
+    """
+    fuel_logs = FuelLog.objects.filter(unit=unit, deleted=False)
+    if end is not None:
+        fuel_logs = fuel_logs.filter(date__lt=end)
+    if start is not None:
+        # Fecha de la window-ésima carga anterior a start (si existe)
+        history_start = (
+            fuel_logs.filter(date__lt=start)
+            .order_by("-date", "-id")
+            .values_list("date", flat=True)[window - 1:window]
+            .first()
+        )
+        if history_start is not None:
+            fuel_logs = fuel_logs.filter(date__gte=history_start)
+
+    order_by = [F("date").asc(), F("id").asc()]
+    frame = RowRange(start=-(window - 1), end=0)  # la carga actual y las window-1 anteriores
+    rows = (
+        fuel_logs
+        .annotate(
+            previous_mileage=Window(Lag("cargo_mileage"), order_by=order_by),
+            window_start_mileage=Window(Lag("cargo_mileage", offset=window), order_by=order_by),
+            window_quantity=Window(Sum("quantity"), order_by=order_by, frame=frame),
+            window_cost=Window(Sum("cost"), order_by=order_by, frame=frame),
+        )
+        .order_by("date", "id")
+    )
+
+    series = []
+    for row in rows.values(
+        "id", "date", "cargo_mileage", "quantity", "cost",
+        "previous_mileage", "window_start_mileage", "window_quantity", "window_cost",
+    ):
+        if start is not None and row["date"] < start:
+            continue
+
+        # Solo cuentan las distancias positivas (un retroceso del odómetro no es distancia)
+        distance = None
+        if row["previous_mileage"] is not None and row["cargo_mileage"] > row["previous_mileage"]:
+            distance = row["cargo_mileage"] - row["previous_mileage"]
+
+        window_distance = None
+        if row["window_start_mileage"] is not None and row["cargo_mileage"] > row["window_start_mileage"]:
+            window_distance = row["cargo_mileage"] - row["window_start_mileage"]
+
+        series.append({
+            "id": row["id"],
+            "date": row["date"],
+            "cargo_mileage": row["cargo_mileage"],
+            "quantity": row["quantity"],
+            "cost": row["cost"],
+            "distance": distance,
+            "km_per_liter": ratio(distance, row["quantity"]),
+            "liters_per_100km": ratio(row["quantity"], distance, factor=100),
+            "cost_per_km": ratio(row["cost"], distance),
+            "rolling_km_per_liter": ratio(window_distance, row["window_quantity"]),
+            "rolling_cost_per_km": ratio(row["window_cost"], window_distance),
+        })
+
+    return series
+
+
+def get_fuel_efficiency_summary(series) -> dict:
+    """
+    Rendimiento agregado de una serie, considerando solo las cargas con distancia válida.
+
+    Retorna {"distance", "quantity", "cost", "km_per_liter", "liters_per_100km", "cost_per_km"}.
+    """
+    valid = [row for row in series if row["distance"] is not None]
+    distance = sum(row["distance"] for row in valid)
+    quantity = sum(row["quantity"] for row in valid)
+    cost = sum(row["cost"] for row in valid)
+
+    return {
+        "distance": distance,
+        "quantity": quantity,
+        "cost": cost,
+        "km_per_liter": ratio(distance, quantity),
+        "liters_per_100km": ratio(quantity, distance, factor=100),
+        "cost_per_km": ratio(cost, distance),
+    }
@@ -0,0 +1,142 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from major_equipment.models.fuel_log import FuelLog, FuelMonthlySummary
+from major_equipment.utils.fuel import get_month_datetime_range
+
+
+def next_month(year: int, month: int) -> tuple:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def get_summary_distance(last_mileage, previous_mileage, first_mileage):
+    """
+    Kilómetros recorridos en el mes: desde el último kilometraje del mes anterior
+    (o la primera carga del mes si no hay anterior) hasta el último del mes.
+    """
+    if last_mileage is None:
+        return 0
+    baseline = previous_mileage if previous_mileage is not None else first_mileage
+    return max(last_mileage - baseline, 0)
+
+
+def refresh_fuel_summary(unit_id: int, year: int, month: int):
+    """
+    Recalcula desde FuelLog el resumen de la unidad en el mes (upsert), o lo elimina
+    si ya no tiene cargas. Retorna el FuelMonthlySummary o None.
+    """
+    start, end = get_month_datetime_range(year, month)
+    fuel_logs = FuelLog.objects.filter(unit_id=unit_id, deleted=False)
+    month_logs = fuel_logs.filter(date__gte=start, date__lt=end)
+
+    totals = month_logs.aggregate(
+        total_loads=Count("id"), total_quantity=Sum("quantity"), total_cost=Sum("cost"),
+    )
+    if not totals["total_loads"]:
+        FuelMonthlySummary.objects.filter(unit_id=unit_id, year=year, month=month).delete()
+        return None
+
+    last_mileage = month_logs.order_by("-date", "-id").values_list("cargo_mileage", flat=True).first()
+    first_mileage = month_logs.order_by("date", "id").values_list("cargo_mileage", flat=True).first()
+    previous_mileage = (
+        fuel_logs.filter(date__lt=start).order_by("-date", "-id").values_list("cargo_mileage", flat=True).first()
+    )
+
+    summary, _ = FuelMonthlySummary.objects.update_or_create(
+        unit_id=unit_id, year=year, month=month,
+        defaults={
+            "loads": totals["total_loads"],
+            "quantity": totals["total_quantity"],
+            "cost": totals["total_cost"],
+            "distance": get_summary_distance(last_mileage, previous_mileage, first_mileage),
+            "last_mileage": last_mileage,
+        },
+    )
+    return summary
+
+
+def refresh_fuel_summaries_for(unit_id: int, log_date) -> None:
+    """
+    Recalcula el mes de la carga y el mes de la siguiente carga posterior de la
+    unidad, cuya distancia parte del último kilometraje anterior a su mes (puede
+    haber meses sin cargas entremedio). Los meses siguientes no cambian.
+    """
+    local_date = timezone.localtime(log_date)
+    year, month = local_date.year, local_date.month
+    refresh_fuel_summary(unit_id, year, month)
+
+    next_start, _ = get_month_datetime_range(*next_month(year, month))
+    next_log_date = (
+        FuelLog.objects
+        .filter(unit_id=unit_id, deleted=False, date__gte=next_start)
+        .order_by("date", "id")
+        .values_list("date", flat=True)
+        .first()
+    )
+    if next_log_date is not None:
+        next_local_date = timezone.localtime(next_log_date)
+        refresh_fuel_summary(unit_id, next_local_date.year, next_local_date.month)
+
+
+def rebuild_fuel_summaries(unit_ids=None) -> int:
+    """
+    Reconstruye todos los resúmenes (o los de las unidades indicadas) en una sola
+    pasada ordenada sobre las cargas. Retorna la cantidad de resúmenes creados.
+    """
+    fuel_logs = FuelLog.objects.filter(deleted=False)
+    if unit_ids is not None:
+        fuel_logs = fuel_logs.filter(unit_id__in=unit_ids)
+
+    summaries = []
+    summary = None
+    previous_mileage = None
+    for unit_id, log_date, quantity, cost, mileage in (
+        fuel_logs
+        .order_by("unit_id", "date", "id")
+        .values_list("unit_id", "date", "quantity", "cost", "cargo_mileage")
+        .iterator()
+    ):
+        local_date = timezone.localtime(log_date)
+        key = (unit_id, local_date.year, local_date.month)
+        if summary is None or key != (summary.unit_id, summary.year, summary.month):
+            # La distancia del mes parte del último kilometraje del mes anterior de la misma unidad
+            previous_mileage = summary.last_mileage if summary is not None and summary.unit_id == unit_id else None
+            summary = FuelMonthlySummary(unit_id=unit_id, year=key[1], month=key[2], quantity=0)
+            summary.first_mileage = mileage
+            summaries.append(summary)
+
+        summary.loads += 1
+        summary.quantity += quantity
+        summary.cost += cost
+        summary.last_mileage = mileage
+        summary.distance = get_summary_distance(mileage, previous_mileage, summary.first_mileage)
+
+    with transaction.atomic():
+        existing = FuelMonthlySummary.objects.all()
+        if unit_ids is not None:
+            existing = existing.filter(unit_id__in=unit_ids)
+        existing.delete()
+        FuelMonthlySummary.objects.bulk_create(summaries)
+
+    return len(summaries)
+
+
+def get_fleet_fuel_summary(year: int, units) -> dict:
+    """
+    Totales anuales de combustible de la flota leyendo solo FuelMonthlySummary.
+
+    Retorna:
+        {
+            "months": {month: {"loads", "quantity", "cost", "distance"}},
+            "units":  {unit_id: {"loads", "quantity", "cost", "distance"}},
+        }
+    """
+    fields = ("loads", "quantity", "cost", "distance")
+    months = {}
+    by_unit = {}
+    for row in FuelMonthlySummary.objects.filter(year=year, unit__in=units).values("unit_id", "month", *fields):
+        for stats, key in ((months, row["month"]), (by_unit, row["unit_id"])):
+            totals = stats.setdefault(key, dict.fromkeys(fields, 0))
+            for field in fields:
+                totals[field] += row[field]
+    return {"months": months, "units": by_unit}
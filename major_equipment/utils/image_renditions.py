@@ -0,0 +1,89 @@
+import io
+from django.core.files.base import ContentFile
+
+# Configuración de logging
+import logging
+logger = logging.getLogger('myapp')
+
+# Tamaños derivados de UnitImage: nombre -> (ancho, alto) máximos.
+UNIT_IMAGE_RENDITIONS = {
+    "card": (480, 360),        # tarjeta del listado de unidades
+    "carousel": (1280, 960),   # carrusel de la ficha de la unidad
+}
+
+# Formatos de salida: extensión, formato de Pillow, tipo MIME y opciones de guardado.
+RENDITION_FORMATS = {
+    "webp": ("webp", "WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", "JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def get_rendition_name(original_name: str, size: str, image_format: str) -> str:
+    """
+    Nombre de la versión derivada, junto al original y conservando su nombre completo
+    (foto.jpg y foto.png son imágenes distintas y no deben compartir versiones):
+    unit_images/foto.jpg -> unit_images/foto.jpg.card.webp
+    """
+    return f"{original_name}.{size}.{RENDITION_FORMATS[image_format][0]}"
+
+
+def get_rendition_content_type(image_format: str) -> str:
+    return RENDITION_FORMATS[image_format][2]
+
+
+def render_rendition(source, size: str, image_format: str) -> bytes:
+    """
+    Reduce la imagen (respetando la orientación EXIF y la proporción) al tamaño
+    indicado y la codifica en el formato pedido.
+
+    Lanza ValueError si la imagen supera el límite de píxeles de Pillow
+    (DecompressionBombError), igual que para otros datos no válidos.
+    """
+    # Pillow se importa al generar, no al iniciar el worker
+    from PIL import Image, ImageOps
+
+    _, pil_format, _, options = RENDITION_FORMATS[image_format]
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(UNIT_IMAGE_RENDITIONS[size], Image.Resampling.LANCZOS)
+            if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            image.save(output, pil_format, **options)
+    except Image.DecompressionBombError as exc:
+        raise ValueError(str(exc)) from exc
+    return output.getvalue()
+
+
+def get_unit_image_rendition(field_file, size: str, image_format: str) -> str:
+    """
+    Nombre en el storage de la versión derivada de la imagen, generándola la primera
+    vez que se pide. Lanza OSError (o ValueError) si el original no se puede leer
+    o es demasiado grande.
+    """
+    storage = field_file.storage
+    name = get_rendition_name(field_file.name, size, image_format)
+    if storage.exists(name):
+        return name
+
+    with storage.open(field_file.name, "rb") as source:
+        content = render_rendition(source, size, image_format)
+
+    saved_name = storage.save(name, ContentFile(content))
+    if saved_name != name:
+        # Otro proceso la generó entretanto: se conserva la primera
+        storage.delete(saved_name)
+    logger.debug("Versión %s (%s) de %s generada", size, image_format, field_file.name)
+    return name
+
+
+def delete_unit_image_renditions(field_file) -> None:
+    """Elimina las versiones derivadas de la imagen que existan."""
+    if not field_file or not field_file.name:
+        return
+    for size in UNIT_IMAGE_RENDITIONS:
+        for image_format in RENDITION_FORMATS:
+            name = get_rendition_name(field_file.name, size, image_format)
+            if field_file.storage.exists(name):
+                field_file.storage.delete(name)
@@ -0,0 +1,92 @@
+import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+# Hojas de estilo que se aplican a los PDF (rutas relativas a los estáticos).
+PDF_STYLESHEETS = (
+    "vendor/bootstrap/css/bootstrap.min.css",
+    "major_equipment/css/reports/report_pdf.css",
+)
+
+# Recursos de CDN que tienen una copia local entre los estáticos.
+# Bootstrap se sirve desde static/vendor/bootstrap sin importar la versión 5.x pedida.
+CDN_ASSETS = (
+    (re.compile(r"^https?://cdn\.jsdelivr\.net/npm/bootstrap@5[\d.]*/dist/(?P<path>.+)$"), "vendor/bootstrap/"),
+)
+
+
+def find_static_file(path: str):
+    """
+    Ruta absoluta de un archivo estático, buscando en las fuentes de estáticos
+    y luego en STATIC_ROOT. Retorna None si no existe.
+    """
+    found = finders.find(path)
+    if found:
+        return found
+    if settings.STATIC_ROOT:
+        candidate = os.path.join(settings.STATIC_ROOT, path)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def resolve_static_path(url: str):
+    """
+    Traduce una URL a la ruta relativa del estático local que la reemplaza:
+    - URLs de CDN con copia local (CDN_ASSETS).
+    - URLs bajo STATIC_URL, de cualquier host (el base_url es el propio sitio).
+    Retorna None si la URL no corresponde a un estático local.
+    """
+    for pattern, prefix in CDN_ASSETS:
+        match = pattern.match(url)
+        if match:
+            return prefix + match.group("path")
+
+    path = unquote(urlsplit(url).path)
+    if path.startswith(settings.STATIC_URL):
+        return path[len(settings.STATIC_URL):]
+    return None
+
+
+def offline_url_fetcher(url: str, *args, **kwargs) -> dict:
+    """
+    url_fetcher para WeasyPrint que nunca accede a la red: resuelve estáticos
+    y recursos de CDN a archivos locales. Las URLs data: y file: se delegan al
+    fetcher por defecto; cualquier otra URL remota se rechaza y WeasyPrint
+    omite el recurso.
+    """
+    scheme = urlsplit(url).scheme
+    if scheme in ("data", "file"):
+        # Solo se llama durante un render, con WeasyPrint ya cargado
+        from weasyprint import default_url_fetcher
+        return default_url_fetcher(url, *args, **kwargs)
+
+    static_path = resolve_static_path(url)
+    file_path = find_static_file(static_path) if static_path else None
+    if not file_path:
+        raise ValueError(f"Recurso no disponible sin conexión: {url}")
+
+    mime_type, _ = mimetypes.guess_type(file_path)
+    with open(file_path, "rb") as file:
+        return {
+            "string": file.read(),
+            "mime_type": mime_type,
+            "redirected_url": url,
+            "filename": file_path,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_pdf_stylesheets_digest() -> str:
+    """Hash del contenido de las hojas de estilo de los PDF."""
+    digest = hashlib.sha256()
+    for path in PDF_STYLESHEETS:
+        with open(find_static_file(path), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
@@ -0,0 +1,35 @@
+# Render de PDF con WeasyPrint.
+#
+# Este es el único módulo que importa WeasyPrint (cairo, pango, fonttools), cuya carga
+# es costosa en tiempo y memoria. No debe importarse a nivel de módulo desde vistas,
+# señales ni utilidades: se carga bajo demanda desde report_pdf.write_pdf, de modo
+# que los workers que nunca generan un PDF no pagan ese costo al iniciar.
+from functools import lru_cache
+
+from weasyprint import CSS, HTML
+
+from major_equipment.utils.pdf_assets import PDF_STYLESHEETS, find_static_file, offline_url_fetcher
+
+
+@lru_cache(maxsize=None)
+def get_pdf_stylesheets() -> tuple:
+    """
+    Hojas de estilo de los PDF ya procesadas por WeasyPrint. Se leen y procesan una
+    sola vez por proceso y se reutilizan en cada render.
+    """
+    return tuple(
+        CSS(filename=find_static_file(path), url_fetcher=offline_url_fetcher)
+        for path in PDF_STYLESHEETS
+    )
+
+
+def write_pdf(html_string: str, base_url: str) -> bytes:
+    """
+    Convierte HTML a PDF sin acceder a la red: los recursos se resuelven a
+    estáticos locales y las hojas de estilo llegan ya procesadas.
+    """
+    return HTML(
+        string=html_string,
+        base_url=base_url,
+        url_fetcher=offline_url_fetcher,
+    ).write_pdf(stylesheets=get_pdf_stylesheets())
@@ -2,7 +2,7 @@ from major_equipment.models import *
 from firebrigade.models import Entity
 from django.contrib.auth.models import User
 from django.db.models.query import QuerySet
-from firebrigade.utils import get_user_entities_with_permission
+from firebrigade.utils import get_user_entity_ids_with_permission
 
 def get_units_for_user(user: User) -> QuerySet:
     """
@@ -14,9 +14,9 @@ def get_units_for_user(user: User) -> QuerySet:
     units = Unit.objects.all()
     if user.is_superuser or user.has_perm('major_equipment.view_unit'):
         return units
-    entities = get_user_entities_with_permission(user, 'view_company_majorequipment')
-    if entities.exists():
-        return units.filter(entity__in=entities)
+    entity_ids = get_user_entity_ids_with_permission(user, 'view_company_majorequipment')
+    if entity_ids:
+        return units.filter(entity_id__in=entity_ids)
     return Unit.objects.none()
 
 def user_can_view_unit(user: User, unit: Unit) -> bool:
@@ -25,7 +25,7 @@ def user_can_view_unit(user: User, unit: Unit) -> bool:
     """
     if user.is_superuser or user.has_perm('major_equipment.view_unit'):
         return True
-    return get_user_entities_with_permission(user, 'view_company_majorequipment').filter(pk=unit.entity_id).exists()
+    return unit.entity_id in get_user_entity_ids_with_permission(user, 'view_company_majorequipment')
 
 def user_can_view_unit_image(user: User, image: UnitImage) -> bool:
     """
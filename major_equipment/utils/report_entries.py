@@ -0,0 +1,57 @@
+from django.core.exceptions import ValidationError
+from major_equipment.models.report import QuestionType, ReportEntry, validate_answer
+
+# Largo máximo de la respuesta y el comentario (según el modelo).
+ANSWER_MAX_LENGTH = ReportEntry._meta.get_field("answer").max_length
+COMMENT_MAX_LENGTH = ReportEntry._meta.get_field("comment").max_length
+
+
+def validate_report_answers(template_items, data) -> tuple:
+    """
+    Valida en memoria las respuestas del checklist contra los ítems de la plantilla.
+
+    `template_items` debe traer precargadas las opciones (prefetch_related('options')),
+    de modo que la validación no consulta la base de datos.
+    `data` es el diccionario con los campos q_<id> y q_<id>_comment del formulario.
+
+    Retorna (entries, errors): las ReportEntry sin reporte ni guardar, y la lista de
+    mensajes de error con la etiqueta de la pregunta.
+    """
+    entries = []
+    errors = []
+
+    for item in template_items:
+        answer = (data.get(f"q_{item.id}", "") or "").strip()
+        comment = (data.get(f"q_{item.id}_comment", "") or "").strip()
+
+        item_errors = []
+        if not answer:
+            item_errors.append("Este campo no puede estar en blanco.")
+        elif len(answer) > ANSWER_MAX_LENGTH:
+            item_errors.append(f"La respuesta no puede superar los {ANSWER_MAX_LENGTH} caracteres.")
+        if len(comment) > COMMENT_MAX_LENGTH:
+            item_errors.append(f"El comentario no puede superar los {COMMENT_MAX_LENGTH} caracteres.")
+
+        options = []
+        if item.question_type == QuestionType.MULTIPLE_CHOICE:
+            options = [opt.value for opt in item.options.all()]
+        try:
+            validate_answer(item.question_type, answer, options)
+        except ValidationError as e:
+            item_errors.extend(e.messages)
+
+        if item_errors:
+            errors.extend(f"{item.label}: {err}" for err in item_errors)
+        else:
+            entries.append(ReportEntry(question=item, answer=answer, comment=comment))
+
+    return entries, errors
+
+
+def create_report_entries(report, entries) -> list:
+    """
+    Asocia las entradas ya validadas al reporte y las inserta en una sola consulta.
+    """
+    for entry in entries:
+        entry.report = report
+    return ReportEntry.objects.bulk_create(entries)
@@ -0,0 +1,100 @@
+from itertools import groupby
+from major_equipment.models.report import ReportEntry, ReportTemplateItem
+from major_equipment.utils.alert_rules import get_alert_rules
+
+# Columnas comunes a ambos formatos (datos del reporte).
+REPORT_EXPORT_COLUMNS = ["Fecha", "Compañía", "Unidad", "Autor"]
+
+# Columnas de la exportación en formato largo (una fila por respuesta).
+REPORT_EXPORT_LONG_HEADER = REPORT_EXPORT_COLUMNS + ["Categoría", "Pregunta", "Respuesta", "Comentario", "Alerta"]
+
+# Campos que se leen de cada entrada (sin instanciar modelos).
+ENTRY_EXPORT_FIELDS = (
+    "report_id", "report__date", "report__unit__entity__name", "report__unit__unit_number",
+    "report__author__username", "report__author__first_name", "report__author__last_name",
+    "question_id", "answer", "comment",
+)
+
+
+def get_report_entries_for_export(start, end, units):
+    """
+    Entradas de los reportes (no eliminados) de las unidades entre las fechas indicadas,
+    ordenadas de modo que las entradas de cada reporte queden contiguas.
+    """
+    return (
+        ReportEntry.objects
+        .filter(report__date__range=(start, end), report__deleted=False, report__unit__in=units)
+        .order_by("report__date", "report__unit__unit_number", "report_id", "question_id")
+    )
+
+
+def get_export_questions(entries) -> list:
+    """Preguntas respondidas en las entradas, ordenadas por categoría y etiqueta (una consulta)."""
+    return list(
+        ReportTemplateItem.objects
+        .filter(pk__in=entries.values("question_id"))
+        .select_related("category")
+        .order_by("category__label", "label", "id")
+    )
+
+
+def iter_entries(entries, chunk_size: int):
+    """Recorre las entradas como tuplas (ENTRY_EXPORT_FIELDS), por bloques de `chunk_size`."""
+    return entries.values_list(*ENTRY_EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def report_columns(row) -> list:
+    """Fecha, compañía, unidad y autor de la tupla de una entrada."""
+    _, report_date, entity, unit_number, username, first_name, last_name = row[:7]
+    author = f"{first_name} {last_name}".strip() or username
+    return [report_date, entity, unit_number, author]
+
+
+def get_long_export(entries, chunk_size: int) -> tuple:
+    """
+    Exportación en formato largo: una fila por respuesta, con la alerta evaluada con
+    las reglas compiladas (sin consultas por entrada). Retorna (header, rows).
+    """
+    questions = {question.pk: question for question in get_export_questions(entries)}
+    rules = get_alert_rules(questions.keys())
+
+    def rows():
+        for row in iter_entries(entries, chunk_size):
+            question_id, answer, comment = row[7:]
+            question = questions[question_id]
+            yield report_columns(row) + [
+                question.category.label,
+                question.label,
+                answer,
+                comment,
+                "Sí" if rules[question_id].triggers(answer) else "No",
+            ]
+
+    return REPORT_EXPORT_LONG_HEADER, rows()
+
+
+def get_wide_export(entries, chunk_size: int) -> tuple:
+    """
+    Exportación pivoteada: una fila por reporte y una columna por pregunta, más la
+    cantidad de alertas del reporte. Las entradas de cada reporte se agrupan al vuelo,
+    así que en memoria solo hay un reporte a la vez. Retorna (header, rows).
+    """
+    questions = get_export_questions(entries)
+    rules = get_alert_rules(question.pk for question in questions)
+    positions = {question.pk: index for index, question in enumerate(questions)}
+    header = REPORT_EXPORT_COLUMNS + [
+        f"{question.category.label} / {question.label}" for question in questions
+    ] + ["Alertas"]
+
+    def rows():
+        for _, report_rows in groupby(iter_entries(entries, chunk_size), key=lambda row: row[0]):
+            report_rows = list(report_rows)
+            answers = [""] * len(questions)
+            alerts = 0
+            for row in report_rows:
+                question_id, answer = row[7], row[8]
+                answers[positions[question_id]] = answer
+                alerts += rules[question_id].triggers(answer)
+            yield report_columns(report_rows[0]) + answers + [alerts]
+
+    return header, rows()
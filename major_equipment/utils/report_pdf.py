@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.db.models.query import QuerySet
+from django.template.loader import get_template
+
+from major_equipment.models.report import Report, ReportEntry
+from major_equipment.models.unit import Unit
+from major_equipment.utils.pdf_assets import get_pdf_stylesheets_digest
+
+# Configuración de logging
+import logging
+logger = logging.getLogger('major_equipment')
+
+# Plantillas usadas para generar el PDF de un reporte y el de varios reportes.
+REPORT_PDF_TEMPLATE = "major_equipment/reports/reportPDF.html"
+REPORTS_PDF_TEMPLATE = "major_equipment/reports/reportsPDF.html"
+# Contenido de cada reporte, compartido por ambas plantillas.
+REPORT_PDF_CONTENT_TEMPLATE = "major_equipment/reports/report_pdf_content.html"
+
+# base_url para generar PDF fuera de una petición (p. ej. desde un comando).
+# El url_fetcher resuelve los estáticos localmente, por lo que el host no se usa.
+OFFLINE_BASE_URL = "http://localhost/"
+
+
+def get_report_pdf_cache_dir(report_id: int) -> Path:
+    """Directorio donde se guardan los PDF generados de un reporte."""
+    return Path(settings.REPORT_PDF_CACHE_DIR) / str(report_id)
+
+
+def get_reports_for_pdf() -> QuerySet:
+    """
+    Reportes con su unidad, autor y entradas (con sus preguntas) precargados:
+    un número fijo de consultas sin importar cuántos reportes o entradas haya.
+    """
+    return (
+        Report.objects
+        .select_related("unit", "author")
+        .prefetch_related(
+            Prefetch("entries", queryset=ReportEntry.objects.select_related("question").order_by("pk"))
+        )
+    )
+
+
+def get_report_for_pdf(report_id: int) -> Report:
+    """Recupera un reporte con todo lo necesario para su PDF."""
+    return get_reports_for_pdf().get(pk=report_id)
+
+
+def get_unit_reports_for_pdf(unit: Unit, start: date, end: date) -> QuerySet:
+    """Reportes vigentes de la unidad entre las fechas indicadas (inclusive), por fecha."""
+    return (
+        get_reports_for_pdf()
+        .filter(unit=unit, date__range=(start, end), deleted=False)
+        .order_by("date")
+    )
+
+
+def get_report_content_hash(report: Report) -> str:
+    """
+    Hash del contenido que determina el PDF: datos del reporte, sus entradas,
+    el código fuente de la plantilla y las hojas de estilo.
+    """
+    payload = {
+        "report": [report.pk, str(report.date), str(report.unit), str(report.author), report.coment],
+        "entries": sorted(
+            [entry.pk, entry.question.label, entry.answer, entry.comment]
+            for entry in report.entries.all()
+        ),
+        "template": [
+            get_template(name).template.source
+            for name in (REPORT_PDF_TEMPLATE, REPORT_PDF_CONTENT_TEMPLATE)
+        ],
+        "stylesheets": get_pdf_stylesheets_digest(),
+    }
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def render_report_pdf(report: Report, base_url: str, request=None) -> bytes:
+    """Genera con WeasyPrint el PDF de un reporte."""
+    html_string = get_template(REPORT_PDF_TEMPLATE).render(
+        {"report": report, "unit": report.unit},
+        request=request,
+    )
+    return write_pdf(html_string, base_url)
+
+
+def render_reports_pdf(unit: Unit, reports, period: str, base_url: str, request=None) -> bytes:
+    """
+    Genera un solo PDF con varios reportes de una unidad (una página nueva por
+    reporte) en una única pasada de WeasyPrint.
+    """
+    html_string = get_template(REPORTS_PDF_TEMPLATE).render(
+        {"unit": unit, "reports": reports, "period": period},
+        request=request,
+    )
+    return write_pdf(html_string, base_url)
+
+
+def write_pdf(html_string: str, base_url: str) -> bytes:
+    """
+    Convierte HTML a PDF. El renderer (y con él WeasyPrint) se importa recién
+    aquí, en el primer PDF que genere el proceso.
+    """
+    from major_equipment.utils import pdf_renderer
+    return pdf_renderer.write_pdf(html_string, base_url)
+
+
+def get_report_pdf_path(report: Report, base_url: str, request=None) -> Path:
+    """
+    Retorna la ruta del PDF del reporte en el caché en disco.
+
+    El archivo se identifica por el id del reporte y el hash de su contenido, por lo
+    que solo se genera si el reporte, sus entradas o la plantilla cambiaron desde
+    la última vez. Las versiones anteriores del mismo reporte se eliminan.
+    """
+    cache_dir = get_report_pdf_cache_dir(report.pk)
+    pdf_path = cache_dir / f"{get_report_content_hash(report)}.pdf"
+    if pdf_path.exists():
+        return pdf_path
+
+    pdf_file = render_report_pdf(report, base_url, request=request)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: otro worker nunca ve un PDF a medio escribir
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(pdf_file)
+    os.replace(tmp_path, pdf_path)
+
+    for old in cache_dir.glob("*.pdf"):
+        if old != pdf_path:
+            old.unlink(missing_ok=True)
+
+    logger.debug("PDF del reporte %s generado en %s", report.pk, pdf_path)
+    return pdf_path
+
+
+def invalidate_report_pdf(report_id: int) -> None:
+    """Elimina del caché en disco los PDF generados de un reporte."""
+    shutil.rmtree(get_report_pdf_cache_dir(report_id), ignore_errors=True)
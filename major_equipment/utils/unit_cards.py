@@ -0,0 +1,67 @@
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from major_equipment.models.unit import UnitImage
+
+# Clases de los indicadores de estado de documentos.
+BADGE_VALID = "badge text-bg-success"
+BADGE_EXPIRED = "badge text-bg-danger"
+BADGE_MISSING = "badge text-bg-light"
+
+# Documentos con vencimiento que se muestran en la tarjeta de la unidad.
+CARD_DOCUMENTS = ("vehicle_permit", "soap", "technical_inspection")
+
+
+def get_badge_class(expiration_date, today) -> str:
+    """
+    Devuelve la clase del indicador según la fecha de vencimiento del documento.
+    Si la unidad no tiene el documento asociado, retorna la clase neutra.
+    """
+    if expiration_date is None:
+        return BADGE_MISSING
+    if expiration_date < today:
+        return BADGE_EXPIRED
+    return BADGE_VALID
+
+
+def annotate_unit_cards(units: QuerySet) -> QuerySet:
+    """
+    Anota sobre el QuerySet de unidades los datos necesarios para la tarjeta:
+    - first_image_id: id de la primera imagen de la unidad (o None).
+    - <documento>_expiration: fecha de vencimiento de cada documento (o None).
+    """
+    first_image = (
+        UnitImage.objects
+        .filter(unit=OuterRef("pk"))
+        .order_by("pk")
+        .values("pk")[:1]
+    )
+    expirations = {
+        f"{name}_expiration": F(f"{name}__expiration_date") for name in CARD_DOCUMENTS
+    }
+    return units.select_related("entity").annotate(
+        first_image_id=Subquery(first_image),
+        **expirations,
+    )
+
+
+def get_unit_cards(units: QuerySet) -> list:
+    """
+    Construye los datos de las tarjetas de unidades en una sola consulta,
+    independiente de la cantidad de unidades.
+
+    Cada elemento contiene la unidad, el id de su primera imagen y las
+    clases de los indicadores de documentos (permiso, SOAP y revisión técnica).
+    """
+    # Misma referencia de fecha que FileVencible.is_expired
+    today = timezone.now().date()
+    cards = []
+    for unit in annotate_unit_cards(units):
+        element = {
+            "unit": unit,
+            "image_id": unit.first_image_id,
+        }
+        for name in CARD_DOCUMENTS:
+            element[f"{name}_class"] = get_badge_class(getattr(unit, f"{name}_expiration"), today)
+        cards.append(element)
+    return cards
@@ -1,6 +1,7 @@
 from django.db                                  import IntegrityError
 from django.urls                                import reverse
 from django.utils                               import timezone
+from django.http                                import JsonResponse, HttpResponseBadRequest
 from django.shortcuts                           import render, get_object_or_404, redirect
 from django.contrib.auth.decorators             import login_required
 
@@ -11,6 +12,12 @@ from major_equipment.models.fuel_log            import *
 # Utilidades
 from ..utils.permission                          import *
 from ..utils.calendar                            import *
+from ..utils.fuel                                import get_fuel_month_summary, get_unit_month_fuel_logs
+from ..utils.fuel                                import get_month_datetime_range, get_year_datetime_range
+from ..utils.fuel                                import FUEL_EXPORT_HEADER, get_fuel_export_rows
+from ..utils.export                              import EXPORT_CHUNK_SIZE, EXPORT_CONTENT_TYPES, streaming_export_response
+from ..utils.fuel_summary                        import get_fleet_fuel_summary
+from ..utils.fuel_efficiency                     import get_fuel_efficiency_series, get_fuel_efficiency_summary
 
 # Librerias
 from django.contrib                             import messages
@@ -147,6 +154,7 @@ def view_unit_fuel(request, unit_id):
         month = timezone.localdate().month
 
     data["month_year"] = f"{MESES_ES[month]} {year}"
+    data["year"] = year
 
     if month == 1:
         prev_month, prev_year = 12, year - 1
@@ -162,12 +170,161 @@ def view_unit_fuel(request, unit_id):
     data['prev_url'] = f"{base}?year={prev_year}&month={prev_month}"
     data['next_url'] = f"{base}?year={next_year}&month={next_month}"
 
-    data["fuel_logs"] = FuelLog.objects.filter(unit=data["unit"], date__year=year, date__month=month).order_by("-date")
-    data['fuel_quantity_total'] = sum(log.quantity for log in data["fuel_logs"])
-    data['fuel_cost_total'] = sum(log.cost for log in data["fuel_logs"])
+    data["fuel_logs"] = (
+        get_unit_month_fuel_logs(data["unit"], year, month)
+        .prefetch_related('anomalies')
+        .order_by("-date")
+    )
+
+    # Totales, promedios, estaciones y comparación con el mes anterior (calculados en la base de datos)
+    data["summary"] = get_fuel_month_summary(data["unit"], year, month)
+    data['fuel_quantity_total'] = data["summary"]["totals"]["quantity"]
+    data['fuel_cost_total'] = data["summary"]["totals"]["cost"]
+
+    # Rendimiento del mes (km/L, L/100km, costo por km) y por carga
+    efficiency = get_fuel_efficiency_series(data["unit"], *get_month_datetime_range(year, month))
+    data["efficiency"] = get_fuel_efficiency_summary(efficiency)
+    efficiency_by_log = {row["id"]: row for row in efficiency}
+    for log in data["fuel_logs"]:
+        log.efficiency = efficiency_by_log.get(log.id)
 
     return render(request, "major_equipment/fuel/unit_fuel.html", data)
 
+@login_required # Rendimiento de combustible de una unidad en JSON
+def view_unit_fuel_efficiency_json(request, unit_id):
+    """
+    Serie de rendimiento de la unidad. Con ?year=&month= se limita a ese mes;
+    sin parámetros, incluye todo el historial.
+
+    Respuesta:
+        {
+            "success": True,
+            "summary": {"distance": 1250.0, "quantity": 180.5, "cost": 216600,
+                        "km_per_liter": 6.93, "liters_per_100km": 14.44, "cost_per_km": 173.28},
+            "series": [
+                {
+                    "id": 10,
+                    "date": "2025-03-02T12:00:00-03:00",
+                    "cargo_mileage": 15230.0,
+                    "quantity": 40.0,
+                    "cost": 48000,
+                    "distance": 280.0,
+                    "km_per_liter": 7.0,
+                    "liters_per_100km": 14.29,
+                    "cost_per_km": 171.43,
+                    "rolling_km_per_liter": 6.85,
+                    "rolling_cost_per_km": 175.2
+                },
+                ...
+            ]
+        }
+    """
+    unit = get_object_or_404(Unit, pk=unit_id)
+
+    if not user_can_view_unit(request.user, unit):
+        logger.warning(f'Intento de acceso no autorizado de {request.user} al rendimiento de {unit}')
+        return JsonResponse({"success": False, "error": "No tienes autorización para acceder a esta unidad."}, status=403)
+
+    start = end = None
+    if 'year' in request.GET or 'month' in request.GET:
+        try:
+            start, end = get_month_datetime_range(int(request.GET.get('year')), int(request.GET.get('month')))
+        except (TypeError, ValueError):
+            return JsonResponse({"success": False, "error": "Período inválido."}, status=400)
+
+    series = get_fuel_efficiency_series(unit, start, end)
+    summary = get_fuel_efficiency_summary(series)
+
+    def number(value):
+        return float(value) if value is not None else None
+
+    return JsonResponse({
+        "success": True,
+        "summary": {key: number(value) for key, value in summary.items()},
+        "series": [
+            {
+                **{key: number(value) for key, value in row.items() if key not in ("id", "date", "cost")},
+                "id": row["id"],
+                "date": timezone.localtime(row["date"]).isoformat(),
+                "cost": row["cost"],
+            }
+            for row in series
+        ],
+    })
+
+@login_required # Resumen anual de combustible de la flota en JSON
+def view_fleet_fuel_summary_json(request):
+    """
+    Totales anuales por mes y por unidad, leídos de los resúmenes mensuales
+    (FuelMonthlySummary) de las unidades visibles por el usuario.
+
+    Respuesta:
+        {
+            "success": True,
+            "year": 2025,
+            "months": {"1": {"loads": 12, "quantity": 480.0, "cost": 576000, "distance": 4200.0}, ...},
+            "units": {"3": {"loads": 40, "quantity": 1600.0, "cost": 1920000, "distance": 14000.0}, ...}
+        }
+    """
+    try:
+        year = int(request.GET.get('year', timezone.localdate().year))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Año inválido."}, status=400)
+
+    summary = get_fleet_fuel_summary(year, get_units_for_user(request.user))
+
+    def serialize(stats):
+        return {
+            str(key): {field: float(value) if field in ("quantity", "distance") else value for field, value in totals.items()}
+            for key, totals in stats.items()
+        }
+
+    return JsonResponse({
+        "success": True,
+        "year": year,
+        "months": serialize(summary["months"]),
+        "units": serialize(summary["units"]),
+    })
+
+@login_required # Exportar cargas de combustible por entidad y año (CSV o XLSX)
+def view_export_fuel_logs(request):
+    """
+    Parámetros: ?year=2025&format=csv|xlsx y, opcionalmente, &entity=<id> y/o &unit=<id>.
+    Solo incluye las unidades visibles por el usuario. La respuesta se genera por
+    partes, recorriendo las cargas por bloques, de modo que la memoria no depende
+    de la cantidad de filas.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest("Formato inválido (csv o xlsx).")
+
+    try:
+        year = int(request.GET.get('year', timezone.localdate().year))
+        start, end = get_year_datetime_range(year)
+    except ValueError:
+        return HttpResponseBadRequest("Año inválido.")
+
+    units = get_units_for_user(request.user)
+    filename = f"combustible_{year}"
+    try:
+        if request.GET.get('entity'):
+            units = units.filter(entity_id=int(request.GET['entity']))
+            filename += f"_entidad{request.GET['entity']}"
+        if request.GET.get('unit'):
+            units = units.filter(pk=int(request.GET['unit']))
+            filename += f"_unidad{request.GET['unit']}"
+    except ValueError:
+        return HttpResponseBadRequest("Entidad o unidad inválida.")
+
+    fuel_logs = FuelLog.objects.filter(unit__in=units, date__gte=start, date__lt=end, deleted=False)
+    logger.info(f"El usuario {request.user} exportó cargas de combustible ({filename}.{export_format}).")
+
+    return streaming_export_response(
+        export_format, filename, FUEL_EXPORT_HEADER,
+        get_fuel_export_rows(fuel_logs, EXPORT_CHUNK_SIZE),
+        sheet_name=f"Combustible {year}",
+    )
+
 @login_required # Ver Detalle de carga de combustible
 def view_get_fuel_log(request, unit_id, fuel_log_id):
     data = {}
@@ -1,5 +1,6 @@
 from django.db                                  import transaction
-from django.http                                import HttpResponse
+from django.http                                import HttpResponse, FileResponse, Http404
+from django.http                                import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
 from django.conf                                import settings
 from django.http                                import HttpResponse
 from django.urls                                import reverse
@@ -18,11 +19,17 @@ from major_equipment.models.report              import *
 # Utilidades
 from ..utils.permission                          import *
 from ..utils.calendar                            import *
+from ..utils.report_pdf                          import get_report_for_pdf, get_report_pdf_path
+from ..utils.report_pdf                          import get_unit_reports_for_pdf, render_reports_pdf
+from ..utils.report_entries                      import validate_report_answers, create_report_entries
+from ..utils.compliance                          import get_compliance_matrix
+from ..utils.export                              import EXPORT_CHUNK_SIZE, EXPORT_CONTENT_TYPES, streaming_export_response
+from main.jobs                                  import enqueue_on_commit
+from ..utils.report_export                       import get_report_entries_for_export, get_long_export, get_wide_export
 
 # Librerias
-
-from weasyprint                                 import HTML
 from urllib.parse                               import urlencode
+from datetime                                   import date
 
 # Configuración de logging
 import logging
@@ -34,6 +41,12 @@ MESES_ES = {
         9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
     }
 
+# Máximo de días que abarca una exportación de reportes a PDF.
+MAX_PDF_EXPORT_DAYS = 366
+
+# Máximo de días que abarca una exportación de reportes a CSV/XLSX.
+MAX_REPORT_EXPORT_DAYS = 366
+
 
 @login_required  # Crear Reporte
 def view_create_report(request):
@@ -46,10 +59,11 @@ def view_create_report(request):
 
     unit = get_object_or_404(Unit, pk=unit_id)
 
-    # 2) Cargar plantilla de ítems con su categoría
+    # 2) Cargar plantilla de ítems con su categoría y opciones (una vez, para validar y renderizar)
     template_items = (
         ReportTemplateItem.objects
         .select_related('category')
+        .prefetch_related('options')
         .filter(units=unit)
     )
 
@@ -95,33 +109,20 @@ def view_create_report(request):
                             messages.error(request, err)
                     raise  # abortar transacción
 
+                # Validar todas las respuestas en memoria contra la plantilla ya cargada
+                entries, errors = validate_report_answers(template_items, request.POST)
+                if errors:
+                    for err in errors:
+                        messages.error(request, err)
+                    raise ValidationError(errors)  # abortar transacción
+
                 report.save()
 
-                # Crear cada ReportEntry y, si falla, indicar la pregunta (item.label)
-                for item in template_items:
-                    answer = (request.POST.get(f"q_{item.id}", "") or "").strip()
-                    comment = (request.POST.get(f"q_{item.id}_comment", "") or "").strip()
-
-                    entry = ReportEntry(
-                        report=report,
-                        question=item,
-                        answer=answer,
-                        comment=comment
-                    )
-
-                    try:
-                        entry.full_clean()
-                    except ValidationError as e:
-                        if hasattr(e, "message_dict"):
-                            for errs in e.message_dict.values():
-                                for err in errs:
-                                    messages.error(request, f"{item.label}: {err}")
-                        else:
-                            for err in e.messages:
-                                messages.error(request, f"{item.label}: {err}")
-                        raise  # abortar transacción
-
-                    entry.save()
+                # Insertar todas las entradas en una sola consulta
+                create_report_entries(report, entries)
+
+                # Pre-generar el PDF en segundo plano (al confirmar la transacción)
+                enqueue_on_commit("major_equipment.render_report_pdf", report_id=report.pk)
 
         except ValidationError:
             # Ya mostramos los errores arriba; caemos al render del form
@@ -181,9 +182,47 @@ def view_unit_reports(request):
     base = f"{reverse('major_equipment:unit_reports')}"
     data['prev_url'] = f"{base}?unit={unit_id}&year={prev_year}&month={prev_month}"
     data['next_url'] = f"{base}?unit={unit_id}&year={next_year}&month={next_month}"
+    data['year_url'] = f"{reverse('major_equipment:unit_reports_year')}?unit={unit_id}&year={year}"
+    data['month_pdf_url'] = (
+        f"{reverse('major_equipment:get_unit_reports_pdf', args=[unit.id])}?year={year}&month={month}"
+    )
 
     return render(request, "major_equipment/reports/unit_reports.html", data)
 
+@login_required # Calendario anual de reportes de una unidad
+def view_unit_reports_year(request):
+    unit = get_object_or_404(Unit, pk=request.GET.get('unit'))
+    today = timezone.localdate()
+
+    try:
+        year = int(request.GET.get('year', today.year))
+    except ValueError:
+        year = today.year
+
+    if year < 2000 or year > today.year:
+        year = today.year
+
+    months = get_year_calendar_data(unit, year)
+    for month in months:
+        month["name"] = MESES_ES[month["month"]]
+        month["url"] = f"{reverse('major_equipment:unit_reports')}?unit={unit.id}&year={year}&month={month['month']}"
+
+    done = sum(month["done"] for month in months)
+    expected = sum(month["expected"] for month in months)
+
+    base = reverse('major_equipment:unit_reports_year')
+    data = {
+        "unit": unit,
+        "year": year,
+        "months": months,
+        "done": done,
+        "percentage": round(100 * done / expected, 1) if expected else None,
+        "prev_url": f"{base}?unit={unit.id}&year={year - 1}",
+        "next_url": f"{base}?unit={unit.id}&year={year + 1}",
+    }
+
+    return render(request, "major_equipment/reports/unit_reports_year.html", data)
+
 @login_required # Ver reporte
 def view_get_report(request, report_id):
     data = {}
@@ -192,25 +231,210 @@ def view_get_report(request, report_id):
 
 @login_required # Generar PDF de reporte
 def view_generate_report_pdf(request, report_id):
-    data = {}
-    data['report'] = get_object_or_404(Report, pk=report_id)
-    data['unit'] = data["report"].unit
-
-    # 1. Carga el HTML
-    html_string = render_to_string(
-        'major_equipment/reports/reportPDF.html',  # ruta relativa a tu carpeta templates/
-        data,                                       # pasamos el contexto
-        request=request                             # para que {% static %} funcione si lo necesitaras
+    try:
+        report = get_report_for_pdf(report_id)
+    except Report.DoesNotExist:
+        raise Http404("Reporte no encontrado.")
+
+    # 1. Obtiene el PDF desde el caché en disco (solo se genera si el reporte cambió)
+    pdf_path = get_report_pdf_path(
+        report,
+        base_url=request.build_absolute_uri('/'),   # para resolver rutas a estáticos
+        request=request,
+    )
+
+    # 2. Devuelve la respuesta PDF
+    return FileResponse(
+        open(pdf_path, 'rb'),
+        content_type='application/pdf',
+        filename=f"reporte_{report.pk}.pdf",
     )
 
-    # 2. Genera el PDF
-    pdf_file = HTML(
-        string=html_string,
-        base_url=request.build_absolute_uri('/')   # para resolver rutas a estáticos
-    ).write_pdf()
+@login_required # Generar un PDF con los reportes de una unidad en un mes o rango de fechas
+def view_generate_unit_reports_pdf(request, unit_id):
+    """
+    Genera un solo PDF con todos los reportes de la unidad en el período indicado:
+    - ?year=&month= para un mes completo.
+    - ?start=AAAA-MM-DD&end=AAAA-MM-DD para un rango de fechas (inclusive).
+    """
+    unit = get_object_or_404(Unit, pk=unit_id)
+
+    if not user_can_view_unit(request.user, unit):
+        logger.warning(f'Intento de acceso no autorizado de {request.user} a los reportes de {unit}')
+        return HttpResponseForbidden("No tienes autorización para acceder a los reportes de esta unidad.")
+
+    try:
+        if request.GET.get('start') or request.GET.get('end'):
+            start = date.fromisoformat(request.GET.get('start', ''))
+            end = date.fromisoformat(request.GET.get('end', ''))
+            period = f"{start:%d-%m-%Y} al {end:%d-%m-%Y}"
+        else:
+            year = int(request.GET.get('year', timezone.localdate().year))
+            month = int(request.GET.get('month', timezone.localdate().month))
+            start, end = get_month_range(year, month)
+            period = f"{MESES_ES[month]} {year}"
+    except (ValueError, KeyError):
+        return HttpResponseBadRequest("Período inválido.")
+
+    if end < start or (end - start).days >= MAX_PDF_EXPORT_DAYS:
+        return HttpResponseBadRequest(f"El período debe abarcar entre 1 y {MAX_PDF_EXPORT_DAYS} días.")
+
+    reports = get_unit_reports_for_pdf(unit, start, end)
+    pdf_file = render_reports_pdf(
+        unit,
+        reports,
+        period,
+        base_url=request.build_absolute_uri('/'),
+        request=request,
+    )
 
-    # 3. Devuelve la respuesta PDF
     response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = 'inline; filename="hola_mundo.pdf"'
+    response['Content-Disposition'] = f'inline; filename="reportes_{unit.unit_number}_{start}_{end}.pdf"'
     return response
 
+def get_requested_month(request):
+    """
+    Año y mes pedidos por ?year=&month= (por defecto, los actuales), validados
+    igual que en los calendarios de reportes.
+    """
+    today = timezone.localdate()
+    try:
+        year = int(request.GET.get('year', today.year))
+    except ValueError:
+        year = today.year
+
+    if year < 2000 or year > today.year:
+        year = today.year
+
+    try:
+        month = int(request.GET.get('month', today.month))
+    except ValueError:
+        month = today.month
+
+    if month not in MESES_ES.keys():
+        month = today.month
+
+    return year, month
+
+def get_visible_compliance_matrix(request):
+    """
+    Matriz de cumplimiento del mes pedido para las unidades visibles por el usuario.
+    """
+    year, month = get_requested_month(request)
+    units = get_units_for_user(request.user).select_related('entity').order_by('unit_number')
+    matrix = get_compliance_matrix(units, year, month, timezone.localdate())
+    return year, month, matrix
+
+@login_required # Matriz de cumplimiento de checklist (todas las unidades × días del mes)
+def view_compliance_matrix(request):
+    year, month, matrix = get_visible_compliance_matrix(request)
+
+    data = {
+        "title": "Material Mayor | Cumplimiento de checklist",
+        "month_year": f"{MESES_ES[month]} {year}",
+        "year": year,
+        "matrix": matrix,
+    }
+
+    if month == 1:
+        prev_month, prev_year = 12, year - 1
+    else:
+        prev_month, prev_year = month - 1, year
+
+    if month == 12:
+        next_month, next_year = 1, year + 1
+    else:
+        next_month, next_year = month + 1, year
+
+    base = reverse('major_equipment:compliance_matrix')
+    data['prev_url'] = f"{base}?year={prev_year}&month={prev_month}"
+    data['next_url'] = f"{base}?year={next_year}&month={next_month}"
+
+    return render(request, "major_equipment/reports/compliance_matrix.html", data)
+
+@login_required # Matriz de cumplimiento de checklist en JSON
+def view_compliance_matrix_json(request):
+    """
+    Respuesta:
+        {
+            "success": True,
+            "year": 2025,
+            "month": 3,
+            "days": [1, 2, ..., 31],
+            "units": [
+                {
+                    "id": 1,
+                    "unit_number": "B-1",
+                    "cells": ["done", "missing", ..., "future"],
+                    "done": 20,
+                    "expected": 24,
+                    "percentage": 83.3
+                },
+                ...
+            ]
+        }
+    """
+    year, month, matrix = get_visible_compliance_matrix(request)
+
+    return JsonResponse({
+        "success": True,
+        "year": year,
+        "month": month,
+        "days": matrix["days"],
+        "units": [
+            {
+                "id": row["unit"].id,
+                "unit_number": row["unit"].unit_number,
+                "cells": row["cells"],
+                "done": row["done"],
+                "expected": row["expected"],
+                "percentage": row["percentage"],
+            }
+            for row in matrix["rows"]
+        ],
+    })
+
+@login_required # Exportar reportes y respuestas (CSV o XLSX)
+def view_export_reports(request):
+    """
+    Exporta las respuestas de los checklists de las unidades visibles por el usuario.
+
+    Parámetros:
+    - ?start=AAAA-MM-DD&end=AAAA-MM-DD (inclusive) o ?year= (año completo).
+    - &format=csv|xlsx
+    - &layout=long (una fila por respuesta) | wide (una fila por reporte, una columna por pregunta)
+    - opcionales &entity=<id> y &unit=<id>
+    """
+    export_format = request.GET.get('format', 'csv')
+    layout = request.GET.get('layout', 'long')
+    if export_format not in EXPORT_CONTENT_TYPES or layout not in ('long', 'wide'):
+        return HttpResponseBadRequest("Formato inválido.")
+
+    try:
+        if request.GET.get('start') or request.GET.get('end'):
+            start = date.fromisoformat(request.GET.get('start', ''))
+            end = date.fromisoformat(request.GET.get('end', ''))
+        else:
+            year = int(request.GET.get('year', timezone.localdate().year))
+            start, end = date(year, 1, 1), date(year, 12, 31)
+
+        units = get_units_for_user(request.user)
+        if request.GET.get('entity'):
+            units = units.filter(entity_id=int(request.GET['entity']))
+        if request.GET.get('unit'):
+            units = units.filter(pk=int(request.GET['unit']))
+    except ValueError:
+        return HttpResponseBadRequest("Parámetros inválidos.")
+
+    if end < start or (end - start).days >= MAX_REPORT_EXPORT_DAYS:
+        return HttpResponseBadRequest(f"El período debe abarcar entre 1 y {MAX_REPORT_EXPORT_DAYS} días.")
+
+    entries = get_report_entries_for_export(start, end, units)
+    if layout == 'wide':
+        header, rows = get_wide_export(entries, EXPORT_CHUNK_SIZE)
+    else:
+        header, rows = get_long_export(entries, EXPORT_CHUNK_SIZE)
+
+    filename = f"reportes_{layout}_{start}_{end}"
+    logger.info(f"El usuario {request.user} exportó reportes ({filename}.{export_format}).")
+    return streaming_export_response(export_format, filename, header, rows, sheet_name="Reportes")
@@ -10,6 +10,13 @@ from major_equipment.models.unit                import *
 
 # Utilidades
 from ..utils.permission                         import *
+from ..utils.unit_cards                         import get_unit_cards
+from ..utils.expirations                        import get_expiration_dashboard, get_visible_entity_ids
+from django.utils                               import timezone
+from ..utils.image_renditions                  import UNIT_IMAGE_RENDITIONS, get_rendition_content_type
+from ..utils.image_renditions                  import get_unit_image_rendition
+from main.file_delivery                         import StoredFile, serve_file
+from django.utils.cache                         import patch_vary_headers
 
 import mimetypes
 # Configuración de logging
@@ -40,40 +47,10 @@ def view_get_units(request: HttpRequest) -> HttpResponse:
     # Ordenamos las unidades por número de unidad
     units = units.order_by("unit_number")
 
-    # Preparamos los datos de las unidades para el template
-    # Incluimos la primera imagen de cada unidad para mostrarla en la tarjeta
-    # Incluimos clases indicadores del estado de los documentos asociados.
+    # Preparamos los datos de las unidades para el template en una sola consulta:
+    # primera imagen de cada unidad y clases indicadoras del estado de los documentos.
     # Solo falta el estado del vehiculo (verde operativo, rojo fuera de servicio)
-    units_data = []
-    for unit in units:
-        element = {
-            "unit": unit,
-            "image": unit.images.first(),
-        }
-
-        if unit.vehicle_permit and not unit.vehicle_permit.is_expired:
-            element["vehicle_permit_class"] = "badge text-bg-success"
-        elif unit.vehicle_permit and unit.vehicle_permit.is_expired:
-            element["vehicle_permit_class"] = "badge text-bg-danger"
-        else:
-            element["vehicle_permit_class"] = "badge text-bg-light"
-
-        if unit.soap and not unit.soap.is_expired:
-            element["soap_class"] = "badge text-bg-success"
-        elif unit.soap and unit.soap.is_expired:
-            element["soap_class"] = "badge text-bg-danger"
-        else:
-            element["soap_class"] = "badge text-bg-light"
-
-        if unit.technical_inspection and not unit.technical_inspection.is_expired:
-            element["technical_inspection_class"] = "badge text-bg-success"
-        elif unit.technical_inspection and unit.technical_inspection.is_expired:
-            element["technical_inspection_class"] = "badge text-bg-danger"
-        else:
-            element["technical_inspection_class"] = "badge text-bg-light"
-
-        units_data.append(element)
-
+    units_data = get_unit_cards(units)
 
     # Creación del contexto para la plantilla
     context = {
@@ -84,6 +61,25 @@ def view_get_units(request: HttpRequest) -> HttpResponse:
 
     return render(request, "major_equipment/unit/units.html", context)
 
+@login_required # Panel de vencimientos de documentos de la flota.
+def view_expiration_dashboard(request: HttpRequest) -> HttpResponse:
+    """
+    Lista los SOAP, revisiones técnicas y permisos de circulación de las unidades
+    visibles para el usuario, agrupados por días restantes. Los días y el tramo de
+    cada documento se calculan en la base de datos en una sola consulta.
+    """
+    today = timezone.localdate()
+    buckets = get_expiration_dashboard(today, get_visible_entity_ids(request.user))
+
+    context = {
+        "title": "Material Mayor | Vencimiento de documentos",
+        "today": today,
+        "buckets": buckets,
+        "total": sum(len(bucket["documents"]) for bucket in buckets),
+    }
+
+    return render(request, "major_equipment/unit/expirations.html", context)
+
 @login_required # Detalle de unidad (Ficha resumen y documentos asociados).
 def view_get_unit(request: HttpRequest, unit_id: int) -> HttpResponse:
     user = request.user
@@ -126,23 +122,32 @@ def protected_unit_image(request, image_id):
         )
         raise PermissionDenied("No tienes autorización para acceder a esta imagen.")
 
+    # Versión reducida (?size=card|carousel), en WebP si el navegador lo acepta
+    size = request.GET.get("size")
+    if size in UNIT_IMAGE_RENDITIONS and img.image:
+        image_format = "webp" if "image/webp" in request.headers.get("Accept", "") else "jpeg"
+        try:
+            rendition = get_unit_image_rendition(img.image, size, image_format)
+        except (OSError, ValueError):
+            logger.exception("No se pudo generar la versión %s de la imagen | image_id=%s", size, image_id)
+        else:
+            response = serve_file(
+                request,
+                StoredFile(rendition, img.image.storage),
+                content_type=get_rendition_content_type(image_format),
+            )
+            patch_vary_headers(response, ["Accept"])
+            return response
+
     # Adivinar MIME por el nombre (funciona aunque no haya .path en storage remotos)
     filename = getattr(img.image, "name", None)
     content_type, _ = mimetypes.guess_type(filename or "")
 
+    # Entrega del archivo: Django o el proxy, según settings.FILE_DELIVERY_BACKEND
     try:
-        # Abrir desde el storage configurado (local o remoto)
-        file_handle = img.image.open("rb")
-    except FileNotFoundError:
+        # inline sugiere al browser mostrarla si puede
+        return serve_file(request, img.image, content_type=content_type)
+    except Http404:
         # Registro para auditoría
         logger.error("Archivo de imagen no encontrado en storage | image_id=%s", image_id)
-        raise Http404("Imagen no encontrada.")
-    except OSError:
-        logger.exception("Error de E/S al abrir la imagen | image_id=%s", image_id)
-        raise Http404("Imagen no encontrada.")
-
-    # Entrega del archivo
-    response = FileResponse(file_handle, content_type=content_type or "application/octet-stream")
-    # inline sugiere al browser mostrarla si puede
-    response["Content-Disposition"] = f'inline; filename="{filename or "image"}"'
-    return response
\ No newline at end of file
+        raise